@@ -1,10 +1,39 @@
 import streamlit as st
 import pandas as pd
-import os
+from compare import compare_indexes
+from analysis import analysis_columns
+from excel_stream import MissingColumnsError
+from ingest import compare_columns, load_job_overviews, stored_job_overviews, store_overview
+from near_duplicates import find_near_duplicates
+import profiling
+from parse_cache import cache_stats
+import store
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode, ColumnsAutoSizeMode
 st.set_page_config(layout='wide')
 st.title("Compare Multiple Job Overview Files (Showing Equipment Name)")
 
+# Stage timings for this rerun (MA_PROFILE=1 turns this on by default)
+profile = st.sidebar.checkbox("Profile this run", value=profiling.env_enabled())
+# A rerun can start in a fresh thread (and context); stop the tracer of this
+# session's previous run in case it was interrupted before the end
+if 'tracer' in st.session_state:
+    st.session_state['tracer'].stop()
+tracer = profiling.start(profile, profile and st.sidebar.checkbox("Include cProfile", value=False))
+st.session_state['tracer'] = tracer
+
+
+@st.cache_data(max_entries=64)
+def save_upload(dataset_key, name, export_date, _result):
+    # Append an uploaded export to the analytics store once per file and date
+    return store_overview(_result, export_date)
+
+
+@st.cache_data(max_entries=64)
+def near_duplicate_jobs(dataset_key, _df):
+    # Once per file content, not on every rerun (grid selections, checkboxes)
+    with profiling.stage('near duplicates', rows=len(_df)):
+        return find_near_duplicates(_df)
+
 # 1) File Uploader for multiple Job Overview files
 job_overview_files = st.file_uploader(
     "Upload Job Overview files (xlsx)",
@@ -12,124 +41,81 @@ job_overview_files = st.file_uploader(
     accept_multiple_files=True
 )
 
-if job_overview_files:
-
-    for job_file in job_overview_files:
-        df = pd.read_excel(job_file)
-
-        # Define the columns that must match to consider a row a duplicate
-        duplicate_columns = ["Equipment Code", "Equipment Name", "Job Code", "Job Title"]
+# Exports already in the analytics store are compared by query, without re-reading Excel
+stored = store.list_exports()
+labels = {i: f"{vessel} ({export_date:%Y-%m-%d})"
+          for i, vessel, export_date in zip(stored['Export'], stored['Vessel'], stored['Export Date'])}
+if st.sidebar.checkbox("Compare the latest export of every stored vessel"):
+    stored_ids = store.latest_exports()['Export'].tolist()
+else:
+    stored_ids = st.sidebar.multiselect("Stored exports to compare", list(labels), format_func=labels.get)
+keep_in_store = st.sidebar.checkbox("Save uploads to the analytics store")
+export_date = st.sidebar.date_input("Export date") if keep_in_store else None
+
+if job_overview_files or stored_ids:
+
+    # Parse every uploaded file exactly once, in parallel; duplicates, the comparison
+    # and the analytics store reuse it (with the analysis columns when saving)
+    loaded = []
+    columns = analysis_columns if keep_in_store else compare_columns
+    with profiling.stage('load files', rows=len(job_overview_files)):
+        load_results = load_job_overviews(job_overview_files, columns) if job_overview_files else []
+    if keep_in_store:
+        with profiling.stage('save to store', rows=len(job_overview_files)):
+            for result in load_results:
+                if result.error is None:
+                    try:
+                        save_upload(result.dataset_key, result.name, export_date, result)
+                    except MissingColumnsError as e:
+                        # Still compared, just not stored
+                        st.error(f"{result.name} was not saved to the analytics store ({e}).")
+    with profiling.stage('load stored exports', rows=len(stored_ids)):
+        load_results += stored_job_overviews(stored[stored['Export'].isin(stored_ids)])
+    for result in load_results:
+        if result.error is not None:
+            # A bad file is reported and left out of the comparison
+            st.error(f"Error reading {result.name}: {result.error}")
+        else:
+            loaded.append(result)
+    st.sidebar.caption(f"Parse cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+    if not loaded:
+        st.stop()
 
-        # Identify rows where all four columns match
-        duplicates_df = df[df.duplicated(subset=duplicate_columns, keep=False)].copy()
+    for result in loaded:
+        duplicates_df = result.overview.duplicates
 
         if not duplicates_df.empty:
             # Create an expander for the file only if duplicates are found
-            with st.expander(f"Duplicates in {job_file.name}"):
+            with st.expander(f"Duplicates in {result.name}"):
                 st.write(
                     "Below are the rows that have duplicate Equipment Code, "
                     "Equipment Name, Job Code, and Job Title "
-                    f"in **{job_file.name}**."
+                    f"in **{result.name}**."
                 )
                 st.dataframe(duplicates_df)
         else:
             # If no duplicates, just display a message
-            st.write(f"No duplicates found in {job_file.name}")
-
-    # STEP A: Collect a Union of All Equipment Codes & Build File Dictionaries
-
-    all_eq_codes = set()
-    # For each file, store a dict: eq_code -> list of (eq_name, job_title)
-    file_dicts = {}  # file_dicts[file_name] = (eq_code_to_pairs, sorted_list_of_codes)
-
-    for job_file in job_overview_files:
-        df = pd.read_excel(job_file)
-        df['Equipment Code'] = df['Equipment Code'].astype(str).str.strip()
-
-        eq_code_to_pairs = {}
-        for _, row in df.iterrows():
-            code_in_file = row['Equipment Code']
-            # Some files might not have an Equipment Name for every row, so handle gracefully
-            eq_name = str(row.get('Equipment Name', 'Unknown')).strip()
-            job_title = str(row.get('Job Title', 'Unknown')).strip()
-
-            # Append (Equipment Name, Job Title) to this code
-            eq_code_to_pairs.setdefault(code_in_file, []).append((eq_name, job_title))
-
-        # Keep track of all unique codes from this file
-        all_eq_codes.update(eq_code_to_pairs.keys())
-
-        # Sort the codes in this file
-        sorted_codes = sorted(eq_code_to_pairs.keys())
+            st.write(f"No duplicates found in {result.name}")
 
-        file_name = os.path.splitext(job_file.name)[0]
-        file_dicts[file_name] = (eq_code_to_pairs, sorted_codes)
+        # Titles that differ only in case, punctuation or abbreviations
+        near_duplicates_df = near_duplicate_jobs(result.dataset_key, result.overview.df)
+        if not near_duplicates_df.empty:
+            with st.expander(f"Near-duplicates in {result.name} ({near_duplicates_df['Cluster'].nunique()} clusters)"):
+                st.dataframe(near_duplicates_df)
 
-    # Convert all_eq_codes to a sorted list for consistent ordering
-    master_eq_codes = sorted(all_eq_codes)
-
-    # STEP B: Build the Comparison DataFrame
-    # We'll also build a dictionary eq_code_to_all_names to store the union of eq_names
-    eq_code_to_all_names = {mc: set() for mc in master_eq_codes}
-
-    result_df = pd.DataFrame({'Equipment Code': master_eq_codes})
+    # STEPS A-D: Compare the files' prefix indexes
+    # file_dicts[file_name] = PrefixIndex over eq_code -> list of (eq_name, job_title)
+    file_dicts = {result.overview.file_name: result.overview.index for result in loaded}
     file_names = list(file_dicts.keys())
 
-    # We'll store the actual matched (eq_name, job_title) pairs for each (master_code, file_name)
-    matched_map = {}
-
     # A progress bar so we can see how far we've gotten
     progress_bar = st.progress(0)
-    total = len(master_eq_codes)
-
-    # Create columns for each file
-    for fn in file_names:
-        result_df[fn] = None
-
-    # For each master code, find how many pairs match in each file
-    for i, master_code in enumerate(master_eq_codes):
-        # Update progress
-        progress_bar.progress((i + 1) / total)
-
-        for fn in file_names:
-            eq_code_to_pairs, sorted_codes_in_file = file_dicts[fn]
-
-            # Gather all (eq_name, job_title) for codes that start with master_code
-            matched_pairs = []
-            for code_in_file, pairs in eq_code_to_pairs.items():
-                if code_in_file.startswith(master_code):
-                    matched_pairs.extend(pairs)
-
-            count = len(matched_pairs)
-            if count > 0:
-                result_df.at[i, fn] = f"Y({count})"
-            else:
-                result_df.at[i, fn] = "N"
-
-            # Store the matched pairs
-            matched_map[(master_code, fn)] = matched_pairs
-
-            # Update eq_code_to_all_names with the equipment names from these pairs
-            for (ename, _) in matched_pairs:
-                eq_code_to_all_names[master_code].add(ename)
-
-    # STEP C: Add an "Equipment Name" column to show the union of eq_names
-    # We'll display them as comma-separated strings
-    eq_names_list = []
-    for mc in master_eq_codes:
-        all_names_for_mc = eq_code_to_all_names[mc]
-        eq_names_list.append(", ".join(sorted(all_names_for_mc)) if all_names_for_mc else "")
-
-    result_df.insert(1, "Equipment Name", eq_names_list)  # Insert after "Equipment Code"
-
-
-    # STEP D: Mismatch Column
-    def check_mismatch(row, cols):
-        unique_vals = set(row[cols])
-        return "Y" if len(unique_vals) > 1 else "N"
-
+    comparison = compare_indexes(file_dicts, progress_bar.progress)
+    with profiling.stage('render comparison', rows=len(comparison.master_codes)):
+        result_df = comparison.to_frame()
 
-    result_df['Mismatch'] = result_df.apply(lambda r: check_mismatch(r, file_names), axis=1)
+    with st.expander("Coverage per file"):
+        st.dataframe(comparison.coverage())
 
     # STEP E: Filter & Download
     show_only_mismatches = st.checkbox("Show only rows with Mismatch = Y")
@@ -182,7 +168,8 @@ if job_overview_files:
             st.subheader(f"Equipment Code: {eq_code} | Equipment Name(s): {eq_names_str}")
 
             for fn in file_names:
-                pairs = matched_map.get((eq_code, fn), [])
+                # Matched pairs come straight from the file's prefix index
+                pairs = file_dicts[fn].matched_pairs(eq_code)
                 st.write(f"**{fn}** -> {len(pairs)} matches")
                 # Show "Equipment Name / Job Title" for each match
                 for (ename, jtitle) in pairs:
@@ -190,4 +177,14 @@ if job_overview_files:
 
     progress_bar.progress(1.0)  # Done
 else:
-    st.info("Please upload at least one Job Overview file.")
+    st.info("Please upload at least one Job Overview file or pick stored exports.")
+
+# Profile of this rerun
+tracer.stop()
+if tracer.enabled:
+    with st.sidebar.expander("Profile", expanded=True):
+        st.dataframe(tracer.to_frame(), hide_index=True)
+        st.download_button("Trace (JSON)", tracer.to_json(), file_name="trace.json", mime="application/json")
+        st.download_button("Trace (CSV)", tracer.to_csv(), file_name="trace.csv", mime="text/csv")
+        if tracer.profiler is not None:
+            st.text(tracer.profile_stats())
@@ -1,44 +1,87 @@
 import streamlit as st
 import pandas as pd
-import base64, io
-from data import series_tree, jm_codes
+from central_library import load_central_library
+from analysis import analysis_columns, analyze, check_columns, required_columns, vessel_name
+from excel_stream import MissingColumnsError
+from export import memoized_excel
+import profiling
+from parse_cache import cache_key, cache_stats, cached_read_excel, record_lookup
+from schedule import PERIODS, workload_forecast
+from near_duplicates import find_near_duplicates
+from snapshots import diff_snapshots, previous_snapshot, save_snapshot, snapshot_frame
+import store
 # import plotly.express as px
 
 st.set_page_config(layout="wide")
-# Function to check if DataFrame contains all required columns
-required_columns = [
-    'Equipment Code', 'Equipment Name', 'Job Title', 'Job Type']
-    # , 'Maintenance Type',
-    # 'Primary Frequency', 'Last Done Date', 'Next Due Date', 'Secondary Frequency',
-    # 'Last Done Hrs.', 'Next Due Hrs.', 'Discipline', 'Present Reading',
-    # 'Rhrs/Days Since the Last Entry', 'Remaining RHrs per Days', 'Safety Level',
-    # 'Sub Group', 'Critical to Safety', 'Risk Assessment Required', 'Forms Attached',
-    # 'Procedures', 'P', 'Remarks', 'Job Assigned To', 'Class Reference',
-    # 'Maintenance Cause', 'Job Priority'
-
 today = pd.to_datetime('today').date()
-jobmaster=pd.read_excel('JM.xlsx')
-jobcodes=jobmaster['Job Code'].tolist()
-# st.text(jobcodes)
-
-def check_columns(df):
-    return all(col in df.columns for col in required_columns)
-
-
-def download_excel(df, filename):
-    # Create a BytesIO object to write the Excel data to
-    output = io.BytesIO()
-    # Use the ExcelWriter class to write DataFrame to Excel file
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False)
-    # Set the BytesIO object's position to the start
-    output.seek(0)
-    # Convert the BytesIO object to base64 encoding
-    excel_data = output.read()
-    b64 = base64.b64encode(excel_data).decode()
-    # Generate the download link with base64 encoded Excel data
-    href = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="{filename}.xlsx">Export {filename} to Excel</a>'
-    return href
+
+
+def download_excel(dataset_key, filename, sheets_fn):
+    # Nothing is built until the export is requested; the workbook is then
+    # memoized per (dataset, day, export) so repeated downloads are free. The
+    # day is part of the key: the overdue jobs change at midnight
+    if st.button(f"Export {filename} to Excel", key=f"export_{filename}"):
+        excel_data = memoized_excel((dataset_key, today, filename), sheets_fn)
+        st.download_button(f"Download {filename}.xlsx", excel_data, file_name=f"{filename}.xlsx",
+                           mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                           key=f"download_{filename}")
+
+
+@st.cache_data(max_entries=16)
+def snapshot_delta(dataset_key, vessel, export_date, _df):
+    # Store this export as the vessel's snapshot for export_date and diff it
+    # against the latest earlier snapshot; cached so reruns cost nothing
+    snap = snapshot_frame(_df, export_date)
+    previous_date, previous = previous_snapshot(vessel, export_date)
+    save_snapshot(vessel, export_date, snap)
+    if previous is None:
+        return None, None
+    return previous_date, diff_snapshots(previous, snap)
+
+
+@st.cache_data(max_entries=16)
+def stored_jobs(export_id, ingested):
+    # Reading a stored export is an indexed query; cached per ingest
+    return store.load_export(export_id).drop(columns='Export Date')
+
+
+@st.cache_data(max_entries=16)
+def save_to_store(dataset_key, vessel, export_date, file_name, _df):
+    # Append the export to the analytics store once per dataset and date
+    return store.save_export(_df, vessel, export_date, file_name, dataset_key)
+
+
+@st.cache_data(max_entries=16)
+def near_duplicate_jobs(dataset_key, threshold, _df):
+    with profiling.stage('near duplicates', rows=len(_df)):
+        return find_near_duplicates(_df, threshold)
+
+
+level_labels = ['Series', 'Sub-Series', 'Group']
+
+
+@st.cache_data(max_entries=16)
+def series_rollup(dataset_key, today, _result):
+    # Counts at every level of the series tree, built once per dataset and
+    # day (the Overdue counts depend on today)
+    return _result.rollup()
+
+
+@st.cache_data(max_entries=16)
+def forecast_workload(dataset_key, as_of, horizon_days, period, _df):
+    return workload_forecast(_df, as_of, horizon_days, period)
+
+
+def show_profile(tracer):
+    tracer.stop()
+    if not tracer.enabled:
+        return
+    with st.sidebar.expander("Profile", expanded=True):
+        st.dataframe(tracer.to_frame(), hide_index=True)
+        st.download_button("Trace (JSON)", tracer.to_json(), file_name="trace.json", mime="application/json")
+        st.download_button("Trace (CSV)", tracer.to_csv(), file_name="trace.csv", mime="text/csv")
+        if tracer.profiler is not None:
+            st.text(tracer.profile_stats())
 
 
 # Streamlit app
@@ -48,125 +91,189 @@ def main():
 
     # Upload Excel file
     uploaded_file = st.file_uploader("Upload Excel file", type=["xlsx", "xls"])
+    incremental = st.sidebar.checkbox("Incremental mode (compare with previous export)")
+    large_export = st.sidebar.checkbox("Large export mode (read only the analysis columns)")
+    similarity = st.sidebar.slider("Near-duplicate title similarity", 0.5, 1.0, 0.75, 0.05)
+    # Stage timings for this rerun (MA_PROFILE=1 turns this on by default)
+    profile = st.sidebar.checkbox("Profile this run", value=profiling.env_enabled())
+    use_cprofile = profile and st.sidebar.checkbox("Include cProfile", value=False)
+    # A rerun can start in a fresh thread (and context); stop the tracer of
+    # this session's previous run, which may have returned before show_profile
+    if 'tracer' in st.session_state:
+        st.session_state['tracer'].stop()
+    st.session_state['tracer'] = profiling.start(profile, use_cprofile)
+    # Exports saved earlier can be opened from the analytics store instead of uploaded again
+    stored = store.list_exports().set_index('Export')
+    labels = {i: f"{row['Vessel']} ({row['Export Date']:%Y-%m-%d})" for i, row in stored.iterrows()}
+    stored_export = st.sidebar.selectbox("Open a stored export", [None] + list(labels),
+                                         format_func=lambda i: "-" if i is None else labels[i])
+    keep_in_store = st.sidebar.checkbox("Save uploads to the analytics store")
 
-    if uploaded_file is not None:
+    if uploaded_file is None and stored_export is not None:
+        with profiling.stage('load stored export'):
+            df = stored_jobs(stored_export, stored.at[stored_export, 'Ingested'])
+        dataset_key = f"store-{stored_export}-{stored.at[stored_export, 'Ingested']}"
+        file_name = stored.at[stored_export, 'Vessel']
+        export_date = st.sidebar.date_input("Export date", value=stored.at[stored_export, 'Export Date'])
+    elif uploaded_file is not None:
         # Read Excel file into DataFrame
         try:
-            df = pd.read_excel(uploaded_file)
+            # Parsed frames are cached on disk by the SHA of the uploaded bytes
+            data = uploaded_file.getvalue()
+            columns = analysis_columns if large_export else None
+            # The column selection is part of the key, as in the parse cache
+            dataset_key = cache_key(data, columns)
+            # The header is checked for the required columns before any rows are read
+            df, hit = cached_read_excel(data, columns, required_columns)
+            record_lookup(hit)
+            file_name = uploaded_file.name
 
+        except MissingColumnsError as e:
+            st.error(f"Uploaded file does not contain all required columns ({e}).")
+            st.write("Please upload a valid file")
+            return
         except Exception as e:
             st.error(f"Error reading Excel file: {e}")
             return
+        st.sidebar.caption(f"Parse cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+        export_date = st.sidebar.date_input("Export date", value=today) if incremental or keep_in_store else today
+    else:
+        return
 
-        # Check if DataFrame contains required columns
-        if check_columns(df):
-            st.success(f"Processing....{df.shape[0]} jobs found")
-            df = df[df['Primary Frequency'] != '0 EVENT']
-            df['Triggered'] = df['Last Done Date'].apply(lambda x: 'Y' if pd.notnull(x) else 'N')
-            df = df[['Triggered'] + [col for col in df.columns if col not in ['Vessel', 'Triggered']]]
-            df['Last Done Date'] = pd.to_datetime(df['Last Done Date'])
-            df['Next Due Date'] = pd.to_datetime(df['Next Due Date'], errors='coerce')
-            # df = df[['Triggered', 'Equipment Code', 'Equipment Name', 'Job Title',
-            #          'Primary Frequency', 'Last Done Date', 'Next Due Date',
-            #          'Secondary Frequency', 'Last Done Hrs.', 'Next Due Hrs.',
-            #          'Discipline', 'Present Reading', 'Rhrs/Days Since the Last Entry',
-            #          'Remaining RHrs per Days', 'Safety Level', 'Critical to Safety',
-            #          'Risk Assessment Required', 'Forms Attached', 'Procedures', 'Remarks']]
-
-            treelist = df[['Triggered', 'Equipment Code', 'Equipment Name', 'Job Title','Primary Frequency']]
-            treelist['Series'] = treelist['Equipment Code'].str[0] # Extract the first digit
-            treelist['Sub_Series'] = treelist['Equipment Code'].str[:2]
-            treelist['Series_name'] = treelist['Series'].map(series_tree)
-            treelist['Sub_Series_name'] = treelist['Sub_Series'].map(series_tree)
-            treelist.insert(treelist.columns.get_loc('Equipment Code') + 1, 'Series', treelist.pop('Series'))
-            treelist.insert(treelist.columns.get_loc('Equipment Code') + 2, 'Sub_Series', treelist.pop('Sub_Series'))
-            # st.write(treelist)
-            overdue_jobs = df[df['Next Due Date'].dt.date < today]
-            duplicate_rows = df[df.duplicated(subset=['Equipment Code', 'Equipment Name', 'Job Title'], keep=False)]
-            duplicate_count = duplicate_rows.shape[0]
-            triggered_jobs = df[df['Triggered'] == 'Y']
-            triggered_jobs_count = triggered_jobs.shape[0]
-            non_triggered_jobs = df[df['Triggered'] == 'N']
-            non_triggered_jobs_count = non_triggered_jobs.shape[0]
-            critical_equipment_df = df[df['Safety Level'] == 'CRITICAL']
-            critical_equipment_list = critical_equipment_df['Equipment Name'].unique()
-            critical_jobs_df = df[(df['Safety Level'] == 'CRITICAL') & (df['Critical to Safety'] == 'YES')]
-            critical_jobs_list = critical_jobs_df[['Equipment Name', 'Job Title']]
-
-            if 'Job Code' in df.columns:
-                # New code to filter dataframe based on job codes not in jm_codes
-                jobs_not_in_jobmaster = df[~df['Job Code'].isin(jm_codes)]
-                jobs_not_in_jobmaster = jobs_not_in_jobmaster[~jobs_not_in_jobmaster['Equipment Code'].astype(str).str.startswith('1')]
-                jobs_not_in_jobmaster_count=jobs_not_in_jobmaster.shape[0]
-
-                with st.expander(f'{jobs_not_in_jobmaster_count} Jobs not linked to Central Library'):
-                    st.dataframe(jobs_not_in_jobmaster)
+    # Check if DataFrame contains required columns
+    if check_columns(df):
+        st.success(f"Processing....{df.shape[0]} jobs found")
+        vessel = vessel_name(df, file_name)
+        if keep_in_store and uploaded_file is not None:
+            export_id = save_to_store(dataset_key, vessel, export_date, file_name, df)
+            st.sidebar.caption(f"Stored as export {export_id} ({vessel}, {export_date:%Y-%m-%d})")
+        # All views are computed in one pass by the analysis engine
+        result = analyze(df, today, load_central_library())
+        df = result.df
+        with profiling.stage('materialize views'):
+            overdue_jobs = result.view('overdue')
+            duplicate_rows = result.view('duplicates')
+            duplicate_count = result.count('duplicates')
+            triggered_jobs = result.view('triggered')
+            triggered_jobs_count = result.count('triggered')
+            non_triggered_jobs = result.view('non_triggered')
+            non_triggered_jobs_count = result.count('non_triggered')
+            critical_equipment_list = result.critical_equipment()
+            critical_jobs_list = result.view('critical_jobs', ['Equipment Name', 'Job Title'])
+
+        if 'Job Code' in df.columns:
+            # Jobs whose job codes are not in the compiled Central Library index
+            jobs_not_in_jobmaster = result.view('not_in_library')
+            jobs_not_in_jobmaster_count = result.count('not_in_library')
+
+            with st.expander(f'{jobs_not_in_jobmaster_count} Jobs not linked to Central Library'):
+                st.dataframe(jobs_not_in_jobmaster)
 
-            else:
-                st.error("Please enable job codes and download excel")
-
-            with st.expander('Raw Data'):
-                # Multiselect widget to select columns to display
-                columns_to_display = st.multiselect("Select columns to display", df.columns.tolist(),
-                                                    default=df.columns.tolist())
-
-                # Display the DataFrame with selected columns
-                st.dataframe(df[columns_to_display])
-            with st.expander('Series analysis'):
-                series_analysis = treelist.groupby(['Series','Series_name']).size().reset_index(name='Job Count')
-                series_analysis.index += 1  # Starting row number from 1
-                # Create pie chart
-                # fig = px.pie(series_analysis, values='Job Count', names='Series_name', title='Series Job Counts')
-
-                # Display DataFrame and pie chart in two columns
-                col1, col2 = st.columns([1, 1])
-                with col1:
-                    st.dataframe(series_analysis)
-                with col2:
-                    pass
-                    # st.plotly_chart(fig)
-
-            with st.expander('Critical Items'):
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.header('Critical Equipment List')
-
-                    st.table(critical_equipment_list)
-                with col2:
-                    st.header('Critical Jobs')
-                    download_link_critical_jobs = download_excel(critical_jobs_list, 'Critical_Jobs')
-                    st.markdown(download_link_critical_jobs, unsafe_allow_html=True)
-                    st.dataframe(critical_jobs_list)
-
-            with st.expander(f"{overdue_jobs.shape[0]} Overdue jobs"):
-                download_link_overdue_jobs = download_excel(overdue_jobs, 'Overdue_Jobs')
-                st.markdown(download_link_overdue_jobs, unsafe_allow_html=True)
-                st.dataframe(overdue_jobs, width=None)
-
-            with st.expander(f"{triggered_jobs_count} Triggered jobs"):
-                download_link_triggered_jobs = download_excel(triggered_jobs, 'Triggered_Jobs')
-                st.markdown(download_link_triggered_jobs, unsafe_allow_html=True)
-                st.dataframe(triggered_jobs, width=None)
-
-            with st.expander(f"{non_triggered_jobs_count} Non Triggered jobs"):
-                download_link_non_triggered_jobs = download_excel(non_triggered_jobs, 'Non_Triggered_Jobs')
-                st.markdown(download_link_non_triggered_jobs, unsafe_allow_html=True)
-                st.dataframe(non_triggered_jobs, width=None)
-
-            with st.expander(f"{duplicate_count} Duplicate Jobs"):
-                download_link_duplicate_jobs = download_excel(duplicate_rows, 'Duplicate_Jobs')
-                st.markdown(download_link_duplicate_jobs, unsafe_allow_html=True)
-                # Display duplicate rows, if any
-                if not duplicate_rows.empty:
-                    st.dataframe(duplicate_rows, width=None)
-                else:
-                    st.write("No duplicate Jobs found.")
-
-            # st.dataframe(df)
         else:
-            st.error("Uploaded file does not contain all required columns.")
-            st.write("Please upload a valid file")
+            st.error("Please enable job codes and download excel")
+
+        if incremental:
+            previous_date, delta = snapshot_delta(dataset_key, vessel, export_date, df)
+            if delta is None:
+                st.info(f"First snapshot stored for {vessel}; changes are shown from the next export on.")
+            else:
+                with st.expander(f"Changes for {vessel} since {previous_date:%Y-%m-%d}"):
+                    for name, label in [('new', 'New jobs'), ('removed', 'Removed jobs'),
+                                        ('changed', 'Changed jobs'), ('newly_overdue', 'Newly overdue jobs')]:
+                        st.write(f"**{delta[name].shape[0]} {label}**")
+                        st.dataframe(delta[name])
+
+        with st.expander('Raw Data'):
+            # Multiselect widget to select columns to display
+            columns_to_display = st.multiselect("Select columns to display", df.columns.tolist(),
+                                                default=df.columns.tolist())
+
+            # Display the DataFrame with selected columns
+            st.dataframe(df[columns_to_display])
+        with st.expander('Series analysis'):
+            # Series -> Sub-Series -> Group -> equipment; every step is a lookup in the cached rollup
+            rollup = series_rollup(dataset_key, today, result)
+            node = ''
+            for label in level_labels:
+                level = rollup.level(node)
+                if level.empty:
+                    break
+                level.index += 1  # Starting row number from 1
+                st.dataframe(level.drop(columns=['Parent', 'Level']))
+                names = dict(zip(level['Series'], level['Series_name']))
+                choice = st.selectbox(label, [''] + list(names), key=f"series_{node}",
+                                      format_func=lambda key: f"{key} {names[key]}" if key else "All")
+                if not choice:
+                    break
+                node = choice
+            if node:
+                st.write(f"**Equipment under {' > '.join(rollup.path(node))}**")
+                st.dataframe(rollup.equipment_under(node), hide_index=True)
+
+        with st.expander('Workload forecast'):
+            # Jobs due per week or month, projected from Next Due Date and the job frequency
+            col1, col2 = st.columns(2)
+            period = col1.radio("Jobs due per", list(PERIODS), format_func=PERIODS.get, horizontal=True)
+            horizon = col2.slider("Horizon (days)", 30, 730, 365, 30)
+            forecast = forecast_workload(dataset_key, today, horizon, period, df)
+            st.bar_chart(forecast, x=PERIODS[period], y=['Calendar', 'Running Hours'])
+            download_excel(dataset_key, f'Workload_Forecast_{PERIODS[period]}_{horizon}',
+                           lambda: [('Workload_Forecast', forecast)])
+            st.dataframe(forecast, hide_index=True)
+
+        with st.expander('Export all'):
+            # One workbook with every view as its own sheet, written in a single pass
+            download_excel(dataset_key, 'All_Views', lambda: [('Critical_Jobs', critical_jobs_list),
+                                                              ('Overdue_Jobs', overdue_jobs),
+                                                              ('Triggered_Jobs', triggered_jobs),
+                                                              ('Non_Triggered_Jobs', non_triggered_jobs),
+                                                              ('Duplicate_Jobs', duplicate_rows)])
+
+        with st.expander('Critical Items'):
+            col1, col2 = st.columns(2)
+            with col1:
+                st.header('Critical Equipment List')
+
+                st.table(critical_equipment_list)
+            with col2:
+                st.header('Critical Jobs')
+                download_excel(dataset_key, 'Critical_Jobs', lambda: [('Critical_Jobs', critical_jobs_list)])
+                st.dataframe(critical_jobs_list)
+
+        with st.expander(f"{overdue_jobs.shape[0]} Overdue jobs"):
+            download_excel(dataset_key, 'Overdue_Jobs', lambda: [('Overdue_Jobs', overdue_jobs)])
+            st.dataframe(overdue_jobs, width=None)
+
+        with st.expander(f"{triggered_jobs_count} Triggered jobs"):
+            download_excel(dataset_key, 'Triggered_Jobs', lambda: [('Triggered_Jobs', triggered_jobs)])
+            st.dataframe(triggered_jobs, width=None)
+
+        with st.expander(f"{non_triggered_jobs_count} Non Triggered jobs"):
+            download_excel(dataset_key, 'Non_Triggered_Jobs', lambda: [('Non_Triggered_Jobs', non_triggered_jobs)])
+            st.dataframe(non_triggered_jobs, width=None)
+
+        with st.expander(f"{duplicate_count} Duplicate Jobs"):
+            download_excel(dataset_key, 'Duplicate_Jobs', lambda: [('Duplicate_Jobs', duplicate_rows)])
+            # Display duplicate rows, if any
+            if not duplicate_rows.empty:
+                st.dataframe(duplicate_rows, width=None)
+            else:
+                st.write("No duplicate Jobs found.")
+
+        # Same equipment, titles differing only in case, punctuation or abbreviations
+        near_duplicates = near_duplicate_jobs(dataset_key, similarity, df)
+        with st.expander(f"{near_duplicates.shape[0]} Near-duplicate Jobs "
+                         f"({near_duplicates['Cluster'].nunique()} clusters)"):
+            download_excel(dataset_key, f'Near_Duplicate_Jobs_{round(similarity * 100)}',
+                           lambda: [('Near_Duplicate_Jobs', near_duplicates)])
+            st.dataframe(near_duplicates, width=None)
+
+        # st.dataframe(df)
+    else:
+        st.error("Uploaded file does not contain all required columns.")
+        st.write("Please upload a valid file")
 
 
 if __name__ == "__main__":
     main()
+    show_profile(profiling.current())
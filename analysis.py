@@ -0,0 +1,140 @@
+# Maintenance analysis engine, independent of the Streamlit UI.
+#
+#   result = analyze(df, today, library)
+#
+# analyze() makes a single working copy of the export (without '0 EVENT'
+# jobs), converts the code and flag columns to categoricals once and builds
+# every mask in one pass. Derived views are stored as row-position arrays
+# and only materialized on request:
+#
+#   result.df                    prepared frame (Triggered first, no Vessel)
+#   result.rows[name]            positions into result.df for each view in VIEWS
+#   result.view(name, columns)   materialize one view (optionally only some columns)
+#   result.count(name)           size of one view
+#   result.rollup()              SeriesRollup over the whole series tree (see rollup.py)
+#   result.critical_equipment()  unique Equipment Names with Safety Level CRITICAL
+import os
+
+import numpy as np
+import pandas as pd
+
+from profiling import stage
+from rollup import build_rollup
+
+# Function to check if DataFrame contains all required columns
+required_columns = [
+    'Equipment Code', 'Equipment Name', 'Job Title', 'Job Type']
+    # , 'Maintenance Type',
+    # 'Primary Frequency', 'Last Done Date', 'Next Due Date', 'Secondary Frequency',
+    # 'Last Done Hrs.', 'Next Due Hrs.', 'Discipline', 'Present Reading',
+    # 'Rhrs/Days Since the Last Entry', 'Remaining RHrs per Days', 'Safety Level',
+    # 'Sub Group', 'Critical to Safety', 'Risk Assessment Required', 'Forms Attached',
+    # 'Procedures', 'P', 'Remarks', 'Job Assigned To', 'Class Reference',
+    # 'Maintenance Cause', 'Job Priority'
+
+
+# Every column the analysis reads; large exports are parsed with only these
+analysis_columns = required_columns + ['Vessel', 'Job Code', 'Primary Frequency', 'Last Done Date',
+                                       'Next Due Date', 'Safety Level', 'Critical to Safety',
+                                       'Next Due Hrs.', 'Present Reading', 'Remaining RHrs per Days']
+
+
+def check_columns(df):
+    return all(col in df.columns for col in required_columns)
+
+
+def vessel_name(df, file_name):
+    # The export's Vessel column if present, otherwise the file name
+    if 'Vessel' in df.columns and df['Vessel'].notna().any():
+        return str(df['Vessel'].dropna().iloc[0])
+    return os.path.splitext(os.path.basename(file_name))[0]
+
+
+# Names of the derived views, in display order
+VIEWS = ['overdue', 'triggered', 'non_triggered', 'duplicates', 'critical_equipment',
+         'critical_jobs', 'not_in_library']
+
+duplicate_subset = ['Equipment Code', 'Equipment Name', 'Job Title']
+categorical_columns = ['Equipment Name', 'Job Code', 'Primary Frequency', 'Safety Level',
+                       'Critical to Safety', 'Job Type']
+
+
+def prepare_frame(df):
+    # The one copy of the export that every view indexes into
+    keep = (df['Primary Frequency'] != '0 EVENT').to_numpy()
+    df = df.loc[keep].reset_index(drop=True)
+    if 'Vessel' in df.columns:
+        df.pop('Vessel')
+    triggered = df['Last Done Date'].notna().to_numpy()
+    df.insert(0, 'Triggered', pd.Categorical(np.where(triggered, 'Y', 'N'), categories=['Y', 'N']))
+    df['Last Done Date'] = pd.to_datetime(df['Last Done Date'], errors='coerce')
+    df['Next Due Date'] = pd.to_datetime(df['Next Due Date'], errors='coerce')
+    df['Equipment Code'] = df['Equipment Code'].astype(str).astype('category')
+    for col in categorical_columns:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def code_prefix(codes, length):
+    # First `length` characters of a categorical code column, computed on the
+    # categories only and mapped back through the category codes (missing
+    # codes, -1, take the trailing -1 slot and stay missing)
+    sliced = codes.cat.categories.str[:length]
+    prefix_codes, prefixes = pd.factorize(sliced)
+    prefix_codes = np.append(prefix_codes, -1)
+    return pd.Series(pd.Categorical.from_codes(prefix_codes[codes.cat.codes.to_numpy()], prefixes),
+                     index=codes.index)
+
+
+def _equals(df, column, value):
+    if column not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    return (df[column] == value).to_numpy()
+
+
+class JobAnalysis:
+
+    def __init__(self, df, masks):
+        self.df = df
+        self.rows = {name: np.flatnonzero(mask) for name, mask in masks.items()}
+        self._rollup = None
+
+    def count(self, name):
+        return len(self.rows[name])
+
+    def view(self, name, columns=None):
+        df = self.df if columns is None else self.df[columns]
+        return df.iloc[self.rows[name]]
+
+    def critical_equipment(self):
+        return np.asarray(self.df['Equipment Name'].iloc[self.rows['critical_equipment']].unique())
+
+    def rollup(self):
+        # Built on first use and kept with the result
+        if self._rollup is None:
+            self._rollup = build_rollup(self.df, self.rows)
+        return self._rollup
+
+
+def analyze(df, today, library=None):
+    # library: a CentralLibrary (see central_library.py) for the job code check
+    with stage('prepare frame', rows=len(df)):
+        df = prepare_frame(df)
+    with stage('build masks', rows=len(df)):
+        triggered = (df['Triggered'] == 'Y').to_numpy()
+        critical = _equals(df, 'Safety Level', 'CRITICAL')
+        masks = {
+            'overdue': (df['Next Due Date'] < pd.Timestamp(today)).to_numpy(),
+            'triggered': triggered,
+            'non_triggered': ~triggered,
+            'duplicates': df.duplicated(subset=duplicate_subset, keep=False).to_numpy(),
+            'critical_equipment': critical,
+            'critical_jobs': critical & _equals(df, 'Critical to Safety', 'YES'),
+            'not_in_library': np.zeros(len(df), dtype=bool),
+        }
+        if library is not None and 'Job Code' in df.columns:
+            # Ship general (series 1) jobs are not expected in the Central Library
+            ship_general = code_prefix(df['Equipment Code'], 1).to_numpy() == '1'
+            masks['not_in_library'] = ~library.contains(df['Job Code']) & ~ship_general
+        return JobAnalysis(df, masks)
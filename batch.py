@@ -0,0 +1,197 @@
+# Headless fleet-wide maintenance analysis.
+#
+# Runs the MA_Analysis checks on every Job Overview workbook found in the
+# given directories/globs, compares them the way Compare_wip does, and
+# writes the consolidated outputs:
+#
+#   <output>/summary.xlsx              Summary, Comparison, Coverage and Forecast sheets
+#   <output>/vessels/<file>.parquet    prepared jobs with one flag column per view
+#
+# Files are named by their file name without extension; inputs sharing a file
+# name (exports/MV_A.xlsx, archive/MV_A.xlsx) are named by their path below
+# the inputs' common directory instead (exports/MV_A, archive/MV_A).
+#   <output>/trace.csv, trace.json     stage timings per file (with --profile)
+#
+# With --store every export is also appended to the analytics store (store.py).
+#
+#   python batch.py exports/ "archive/2024-*.xlsx" -o results --workers 16
+import argparse
+import glob
+import os
+import sys
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from analysis import VIEWS, analysis_columns, analyze, required_columns, vessel_name
+from central_library import load_central_library
+from compare import compare_indexes
+from export import excel_bytes
+from ingest import build_prefix_index
+from parse_cache import cached_read_excel
+import profiling
+from schedule import workload_forecast
+from snapshots import safe_name
+import store
+
+# Outcome of analysing one workbook: summary row, comparison index or error
+VesselResult = namedtuple('VesselResult', ['path', 'file_name', 'vessel', 'rows', 'summary', 'index', 'error',
+                                           'trace', 'forecast'])
+
+
+def find_workbooks(inputs):
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(sorted(glob.glob(os.path.join(item, '*.xlsx'))))
+        else:
+            paths.extend(sorted(glob.glob(item)))
+    # Skip Excel lock files and keep the first occurrence of each path
+    return list(dict.fromkeys(path for path in paths if not os.path.basename(path).startswith('~$')))
+
+
+def file_names(paths):
+    # One comparison column / Parquet file name per workbook, unique even
+    # after safe_name; a numeric suffix settles whatever is left
+    stems = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    counts = Counter(stems)
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths]) if paths else ''
+    names = []
+    taken = set()
+    for path, stem in zip(paths, stems):
+        name = stem
+        if counts[stem] > 1:
+            name = os.path.splitext(os.path.relpath(os.path.abspath(path), root))[0].replace(os.sep, '/')
+        unique, n = name, 1
+        while safe_name(unique) in taken:
+            n += 1
+            unique = f"{name} ({n})"
+        taken.add(safe_name(unique))
+        names.append(unique)
+    return names
+
+
+def analyze_workbook(path, file_name, output_dir, today, profile=False, horizon_days=365, store_date=None):
+    # Runs in a worker process; a bad workbook is reported instead of raised
+    tracer = profiling.start(profile)
+    try:
+        with open(path, 'rb') as f:
+            # Only the analysis columns are streamed; the header is validated first
+            df, _ = cached_read_excel(f.read(), analysis_columns, required_columns)
+        vessel = vessel_name(df, path)
+        if store_date is not None:
+            with profiling.stage('save to store', rows=len(df)):
+                store.save_export(df, vessel, store_date, os.path.basename(path))
+        index = build_prefix_index(df)
+        result = analyze(df, today, load_central_library())
+
+        with profiling.stage('write parquet', rows=len(result.df)):
+            jobs = result.df
+            for name in VIEWS:
+                flag = np.zeros(len(jobs), dtype=bool)
+                flag[result.rows[name]] = True
+                jobs[name] = flag
+            jobs.to_parquet(os.path.join(output_dir, 'vessels', safe_name(file_name) + '.parquet'), index=False)
+
+        summary = {'Vessel': vessel, 'File': os.path.basename(path), 'Jobs': len(df),
+                   'Analysed Jobs': len(result.df)}
+        summary.update({name: result.count(name) for name in VIEWS})
+        forecast = workload_forecast(result.df, today, horizon_days, 'M')
+        tracer.stop()
+        return VesselResult(path, file_name, vessel, len(df), summary, index, None, tracer.to_frame(), forecast)
+    except Exception as e:
+        tracer.stop()
+        return VesselResult(path, file_name, None, 0, None, None, f"{type(e).__name__}: {e}", tracer.to_frame(),
+                            None)
+
+
+def run(paths, output_dir, workers, today, profile=False, log=sys.stderr, horizon_days=365, store_date=None):
+    os.makedirs(os.path.join(output_dir, 'vessels'), exist_ok=True)
+    tracer = profiling.start(profile)
+    start = time.perf_counter()
+    results = {}
+    total_rows = 0
+    # Build a stale or missing Central Library index once, before the workers load it
+    with profiling.stage('central library'):
+        load_central_library()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(analyze_workbook, path, file_name, output_dir, today, profile, horizon_days,
+                                   store_date): path for path, file_name in zip(paths, file_names(paths))}
+        for done, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            results[result.path] = result
+            total_rows += result.rows
+            elapsed = max(time.perf_counter() - start, 1e-9)
+            status = result.error or f"{result.vessel}: {result.rows} jobs"
+            print(f"[{done}/{len(paths)}] {os.path.basename(result.path)} - {status} "
+                  f"({done / elapsed:.2f} files/s, {total_rows / elapsed:.0f} rows/s)", file=log)
+
+    # Input order, so the summary and the comparison columns are deterministic
+    ordered = [results[path] for path in paths]
+    succeeded = [result for result in ordered if result.error is None]
+    summary_df = pd.DataFrame([result.summary for result in succeeded])
+    errors_df = pd.DataFrame([{'File': result.path, 'Error': result.error}
+                              for result in ordered if result.error is not None])
+    # One comparison column per file, named like Compare_wip does
+    file_indexes = {result.file_name: result.index for result in succeeded}
+    comparison = compare_indexes(file_indexes)
+    comparison_df = comparison.to_frame()
+
+    # Jobs due per month over the horizon: one column per file and the fleet total
+    forecast_df = pd.DataFrame({'Month': succeeded[0].forecast['Month']} if succeeded else {'Month': []})
+    for result in succeeded:
+        forecast_df[result.file_name] = result.forecast['Total'].to_numpy()
+    forecast_df['Fleet Total'] = forecast_df.iloc[:, 1:].sum(axis=1)
+
+    sheets = [('Summary', summary_df), ('Comparison', comparison_df), ('Coverage', comparison.coverage()),
+              ('Forecast', forecast_df)]
+    if not errors_df.empty:
+        sheets.append(('Errors', errors_df))
+    with profiling.stage('write summary'):
+        with open(os.path.join(output_dir, 'summary.xlsx'), 'wb') as f:
+            f.write(excel_bytes(sheets))
+
+    tracer.stop()
+    if profile:
+        # Worker stages per file, then the comparison and output stages
+        traces = [result.trace.assign(file=result.file_name) for result in ordered]
+        traces.append(tracer.to_frame().assign(file=''))
+        trace_df = pd.concat(traces, ignore_index=True)
+        trace_df.to_csv(os.path.join(output_dir, 'trace.csv'), index=False)
+        trace_df.to_json(os.path.join(output_dir, 'trace.json'), orient='records', indent=2)
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"Done: {len(succeeded)}/{len(paths)} files, {total_rows} rows in {elapsed:.1f}s "
+          f"({len(paths) / elapsed:.2f} files/s, {total_rows / elapsed:.0f} rows/s)", file=log)
+    return summary_df, comparison_df, errors_df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fleet-wide maintenance analysis of Job Overview exports")
+    parser.add_argument('inputs', nargs='+', help="directories or glob patterns of Job Overview workbooks")
+    parser.add_argument('-o', '--output', default='batch_output', help="output directory")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument('--today', default=None, help="reference date for overdue jobs (YYYY-MM-DD)")
+    parser.add_argument('--profile', action='store_true', default=profiling.env_enabled(),
+                        help="write per-stage timings to trace.csv / trace.json")
+    parser.add_argument('--horizon', type=int, default=365, help="days of due jobs in the Forecast sheet")
+    parser.add_argument('--store', action='store_true', help="also append every export to the analytics store")
+    parser.add_argument('--export-date', default=None, help="export date the stored exports are tagged with "
+                                                            "(YYYY-MM-DD, default --today)")
+    args = parser.parse_args(argv)
+
+    paths = find_workbooks(args.inputs)
+    if not paths:
+        parser.error("no .xlsx workbooks found")
+    today = pd.Timestamp(args.today).date() if args.today else pd.Timestamp.today().date()
+    store_date = (pd.Timestamp(args.export_date).date() if args.export_date else today) if args.store else None
+    _, _, errors_df = run(paths, args.output, args.workers, today, args.profile,
+                          horizon_days=args.horizon, store_date=store_date)
+    return 1 if len(errors_df) == len(paths) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
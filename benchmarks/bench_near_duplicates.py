@@ -0,0 +1,55 @@
+# Times near-duplicate detection on synthetic job lists and compares it with
+# the exact df.duplicated check the apps used before.
+#
+#   python benchmarks/bench_near_duplicates.py --jobs 10000 100000
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from near_duplicates import find_near_duplicates
+
+actions = ['Inspection of', 'Check', 'Clean', 'Overhaul', 'Test', 'Replace', 'Calibration of', 'Lubrication of']
+parts = ['main engine', 'auxiliary engine', 'fuel pump', 'lube oil filter', 'cooling water pump',
+         'air compressor', 'fire alarm', 'emergency generator', 'steering gear', 'purifier']
+variants = [lambda t: t.upper(), lambda t: t.replace('Inspection', 'Insp.'), lambda t: t + '.',
+            lambda t: t.replace(' ', '  '), lambda t: t.replace('Check', 'Chk')]
+
+
+def make_jobs(rng, n_jobs, jobs_per_code=8, duplicate_rate=0.05):
+    rows = []
+    n_codes = max(n_jobs // jobs_per_code, 1)
+    for _ in range(n_jobs):
+        code = f"{rng.randint(100, 899)}.{rng.randint(1, max(n_codes // 800, 1)):03d}"
+        title = f"{rng.choice(actions)} {rng.choice(parts)}"
+        rows.append((code, title))
+        if rng.random() < duplicate_rate:
+            rows.append((code, rng.choice(variants)(title)))
+    return pd.DataFrame(rows[:n_jobs], columns=['Equipment Code', 'Job Title'])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for n_jobs in args.jobs:
+        df = make_jobs(random.Random(args.seed), n_jobs)
+        start = time.perf_counter()
+        exact = df[df.duplicated(subset=['Equipment Code', 'Job Title'], keep=False)]
+        exact_time = time.perf_counter() - start
+        start = time.perf_counter()
+        near = find_near_duplicates(df)
+        near_time = time.perf_counter() - start
+        print(f"{n_jobs:>8} jobs: exact {exact_time:7.3f}s ({len(exact)} rows), "
+              f"near {near_time:7.3f}s ({len(near)} rows in {near['Cluster'].nunique()} clusters)")
+
+
+if __name__ == "__main__":
+    main()
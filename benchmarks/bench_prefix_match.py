@@ -0,0 +1,69 @@
+# Compares the original nested startswith loop of Compare_wip STEP B with
+# the PrefixIndex range lookups on synthetic SFI-style equipment codes.
+#
+#   python benchmarks/bench_prefix_match.py --files 10 --codes 2000
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prefix_index import PrefixIndex
+
+
+def make_file(rng, n_codes):
+    eq_code_to_pairs = {}
+    while len(eq_code_to_pairs) < n_codes:
+        code = f"{rng.randint(100, 899)}"
+        for _ in range(rng.randint(0, 3)):
+            code += f".{rng.randint(1, 20):02d}"
+        eq_code_to_pairs[code] = [(f"EQ {code}", f"JOB {j}") for j in range(rng.randint(1, 4))]
+    return eq_code_to_pairs
+
+
+def nested_loop(master_eq_codes, files):
+    counts = {}
+    for master_code in master_eq_codes:
+        for fn, eq_code_to_pairs in files.items():
+            matched_pairs = []
+            for code_in_file, pairs in eq_code_to_pairs.items():
+                if code_in_file.startswith(master_code):
+                    matched_pairs.extend(pairs)
+            counts[(master_code, fn)] = len(matched_pairs)
+    return counts
+
+
+def prefix_index(master_eq_codes, files):
+    indexes = {fn: PrefixIndex(eq_code_to_pairs) for fn, eq_code_to_pairs in files.items()}
+    counts = {}
+    for master_code in master_eq_codes:
+        for fn, index in indexes.items():
+            counts[(master_code, fn)] = index.count(master_code)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=10)
+    parser.add_argument('--codes', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    files = {f"vessel_{i}": make_file(rng, args.codes) for i in range(args.files)}
+    master_eq_codes = sorted(set().union(*files.values()))
+
+    results = {}
+    for name, func in [('nested loop', nested_loop), ('prefix index', prefix_index)]:
+        start = time.perf_counter()
+        results[name] = func(master_eq_codes, files)
+        print(f"{name:>12}: {time.perf_counter() - start:8.3f}s")
+
+    assert results['nested loop'] == results['prefix index'], "prefix index disagrees with nested loop"
+    print(f"{len(master_eq_codes)} master codes x {args.files} files, results identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# End-to-end benchmark of the MA_Analysis stages and the Compare_wip
+# comparison on synthetic fleets, with wall time and peak memory per stage.
+#
+#   python benchmarks/run_benchmarks.py                       # default scales
+#   python benchmarks/run_benchmarks.py --scales 1000000x100 --excel
+#   python benchmarks/run_benchmarks.py --compare results/a.json results/b.json
+#
+# A scale is <total jobs>x<vessels>. Results are stored as
+# benchmarks/results/<timestamp>-<commit>.json so runs can be compared
+# across commits with --compare.
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import profiling
+from analysis import analyze
+from central_library import load_central_library
+from compare import compare_indexes
+from ingest import build_prefix_index
+from near_duplicates import find_near_duplicates
+from parse_cache import read_workbook
+from synthetic import generate_fleet, load_templates, write_fleet
+
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+DEFAULT_SCALES = ['1000x1', '10000x5', '100000x10']
+
+
+def parse_scale(scale):
+    jobs, vessels = scale.lower().split('x')
+    return int(jobs), int(vessels)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def bench_scale(n_jobs, n_vessels, templates, today, excel=False, seed=0):
+    fleet = generate_fleet(n_jobs, n_vessels, seed, templates, today=today)
+    library = load_central_library()
+    tracer = profiling.start(True)
+
+    if excel:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = write_fleet(fleet, tmp, 'xlsx')
+            for path in paths:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                with profiling.stage('parse excel', rows=n_jobs // n_vessels):
+                    read_workbook(data)
+
+    indexes = {}
+    for vessel, df in fleet:
+        analyze(df, today, library)
+        with profiling.stage('near duplicates', rows=len(df)):
+            find_near_duplicates(df)
+        with profiling.stage('prefix index', rows=len(df)):
+            indexes[vessel] = build_prefix_index(df)
+    comparison = compare_indexes(indexes)
+    with profiling.stage('render comparison', rows=len(comparison.master_codes)):
+        comparison.to_frame()
+    tracer.stop()
+
+    # One row per stage, summed over vessels
+    stages = tracer.to_frame().groupby('stage', sort=False).agg(
+        seconds=('seconds', 'sum'), rows=('rows', 'sum'), peak_mb=('peak_mb', 'max'), calls=('stage', 'size'))
+    stages = stages.reset_index()
+    stages.insert(0, 'scale', f"{n_jobs}x{n_vessels}")
+    return stages
+
+
+def run(scales, excel=False, seed=0):
+    templates = load_templates()
+    today = pd.Timestamp(datetime.date.today())
+    frames = []
+    for scale in scales:
+        n_jobs, n_vessels = parse_scale(scale)
+        start = time.perf_counter()
+        stages = bench_scale(n_jobs, n_vessels, templates, today, excel, seed)
+        total = time.perf_counter() - start
+        print(f"{scale:>12}: {stages['seconds'].sum():8.3f}s in stages "
+              f"({total:.1f}s including data generation), peak {stages['peak_mb'].max():.1f} MB")
+        frames.append(stages)
+    return pd.concat(frames, ignore_index=True)
+
+
+def save(results, seed):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    commit = git_commit()
+    stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+    path = os.path.join(RESULTS_DIR, f"{stamp}-{commit}.json")
+    payload = {
+        'commit': commit, 'timestamp': stamp, 'seed': seed,
+        'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+        'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+        'results': results.to_dict(orient='records'),
+    }
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2, default=float)
+    return path
+
+
+def load(path):
+    with open(path) as f:
+        payload = json.load(f)
+    return payload['commit'], pd.DataFrame(payload['results'])
+
+
+def compare(base_path, new_path):
+    base_commit, base = load(base_path)
+    new_commit, new = load(new_path)
+    merged = base.merge(new, on=['scale', 'stage'], how='outer', suffixes=('_base', '_new'))
+    merged['speedup'] = (merged['seconds_base'] / merged['seconds_new']).round(2)
+    merged['peak_mb_delta'] = (merged['peak_mb_new'] - merged['peak_mb_base']).round(2)
+    print(f"base {base_commit} -> new {new_commit}")
+    print(merged[['scale', 'stage', 'seconds_base', 'seconds_new', 'speedup', 'peak_mb_base', 'peak_mb_new',
+                  'peak_mb_delta']].to_string(index=False))
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipeline on synthetic fleets")
+    parser.add_argument('--scales', nargs='+', default=DEFAULT_SCALES, help="<total jobs>x<vessels>, e.g. 100000x10")
+    parser.add_argument('--excel', action='store_true', help="also time parsing the workbooks as .xlsx")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--compare', nargs='*', metavar='RESULT',
+                        help="compare two stored results (default: the two most recent)")
+    args = parser.parse_args()
+
+    if args.compare is not None:
+        paths = args.compare or sorted(glob.glob(os.path.join(RESULTS_DIR, '*.json')))[-2:]
+        if len(paths) != 2:
+            parser.error("need two result files to compare")
+        compare(*paths)
+        return
+
+    results = run(args.scales, args.excel, args.seed)
+    print(results.to_string(index=False))
+    print(f"Results written to {save(results, args.seed)}")
+
+
+if __name__ == "__main__":
+    main()
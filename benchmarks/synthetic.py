@@ -0,0 +1,169 @@
+# Synthetic Job Overview exports for benchmarks.
+#
+# Jobs are drawn from the Central Library templates in JM.xlsx (equipment
+# code, job code, title, type, interval and frequency), falling back to the
+# jm_codes list when JM.xlsx is absent. Each vessel gets realistic Last/Next
+# Due dates, running hours for HOURS jobs, '0 EVENT' jobs and injected exact
+# and near duplicates.
+#
+#   python benchmarks/synthetic.py --jobs 100000 --vessels 10 --format parquet -o synthetic_data
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data import jm_codes, series_tree
+
+JM_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'JM.xlsx')
+
+# Average days per unit of 'Primary Frequency'
+unit_days = {'DAYS': 1.0, 'WEEKS': 7.0, 'MONTH': 30.44, 'MONTHS': 30.44, 'YEARS': 365.25}
+
+columns = ['Vessel', 'Equipment Code', 'Equipment Name', 'Job Title', 'Job Code', 'Job Type',
+           'Maintenance Type', 'Primary Frequency', 'Last Done Date', 'Next Due Date',
+           'Last Done Hrs.', 'Next Due Hrs.', 'Discipline', 'Present Reading',
+           'Remaining RHrs per Days', 'Safety Level', 'Critical to Safety']
+
+
+def load_templates(path=JM_PATH):
+    if os.path.exists(path):
+        jm = pd.read_excel(path)
+        return pd.DataFrame({
+            # Some library jobs list several codes ('366.04.01 ;366.04.02'); use the first
+            'code': jm['Equipment Description'].astype(str).str.split(';').str[0].str.strip(),
+            'job_code': jm['Job Code'].astype(str),
+            'title': jm['Job Title'].astype(str),
+            'job_type': jm['Job Type'].astype(str),
+            'maintenance_type': jm['Maintenance Type'].astype(str),
+            'discipline': jm['Discipline'].astype(str),
+            'interval': jm['Interval(Primary)'].fillna(12).astype(int).clip(lower=1),
+            'unit': jm['Primary Frequency'].fillna('MONTH').astype(str).str.upper(),
+            'critical': jm['Critical to Safety'].fillna('No').astype(str).str.upper(),
+        })
+    # Without JM.xlsx: job codes from data.py on codes built from series_tree
+    rng = np.random.default_rng(0)
+    sub_series = [code for code in series_tree if len(code) == 2]
+    n = len(jm_codes)
+    return pd.DataFrame({
+        'code': [f"{rng.choice(sub_series)}{rng.integers(0, 10)}.{rng.integers(1, 20):02d}" for _ in range(n)],
+        'job_code': jm_codes,
+        'title': [f"{code.split('-')[2].title()} {code.split('-')[1].title()}" for code in jm_codes],
+        'job_type': 'Inspection', 'maintenance_type': 'Company Policy', 'discipline': 'Chief Engineer',
+        'interval': rng.choice([1, 3, 6, 12, 24, 60], n), 'unit': 'MONTH', 'critical': 'NO',
+    })
+
+
+def _equipment_names(codes):
+    # "<series name> <code>" so names are stable per code and readable
+    sub_series = codes.str[:2].map(series_tree).fillna(codes.str[:1].map(series_tree)).fillna('EQUIPMENT')
+    return sub_series.str.title() + ' ' + codes
+
+
+def generate_vessel(rng, templates, n_jobs, vessel, today=None, duplicate_rate=0.02, event_rate=0.03,
+                    untriggered_rate=0.2, critical_rate=0.15):
+    today = pd.Timestamp.today().normalize() if today is None else pd.Timestamp(today)
+    n_base = max(int(round(n_jobs / (1 + duplicate_rate))), 1)
+    # Several units of the same equipment type: 246.01 -> 246.01.001, 246.01.002, ...
+    # Distinct (template, unit) combinations, so jobs only repeat through the
+    # injected duplicates below
+    n_units = max(3, int(np.ceil(2 * n_base / len(templates))))
+    combos = rng.choice(len(templates) * n_units, n_base, replace=False)
+    t = templates.iloc[combos % len(templates)].reset_index(drop=True)
+    units = pd.Series(combos // len(templates) + 1).map('{:03d}'.format)
+    codes = t['code'] + '.' + units
+    hours = (t['unit'] == 'HOURS').to_numpy()
+    daily_rate = np.where(hours, rng.uniform(4, 24, n_base), np.nan)
+    interval_days = np.where(hours, t['interval'] / np.nan_to_num(daily_rate, nan=1.0),
+                             t['interval'] * t['unit'].map(unit_days).fillna(30.44).to_numpy())
+    # Very long running-hour intervals are capped at ten years
+    interval_days = np.minimum(interval_days, 3652.5)
+
+    frequency = t['interval'].astype(str) + ' ' + t['unit']
+    frequency = frequency.where(rng.random(n_base) >= event_rate, '0 EVENT')
+
+    # Last done somewhere in the last 1.3 intervals, so some jobs are overdue
+    elapsed_days = rng.uniform(0, 1.3, n_base) * interval_days
+    triggered = rng.random(n_base) >= untriggered_rate
+    last_done = (today - pd.to_timedelta(elapsed_days, unit='D')).normalize()
+    next_due = (last_done + pd.to_timedelta(interval_days, unit='D')).normalize()
+    untriggered_due = (today + pd.to_timedelta(rng.uniform(-60, 180, n_base), unit='D')).normalize()
+    last_done = last_done.where(triggered, pd.NaT)
+    next_due = next_due.where(triggered, untriggered_due)
+
+    present_reading = np.where(hours, np.round(rng.uniform(1000, 80000, n_base)), np.nan)
+    last_done_hrs = np.where(hours & triggered, np.round(present_reading - elapsed_days * daily_rate), np.nan)
+
+    df = pd.DataFrame({
+        'Vessel': vessel,
+        'Equipment Code': codes,
+        'Equipment Name': _equipment_names(codes),
+        'Job Title': t['title'],
+        'Job Code': t['job_code'],
+        'Job Type': t['job_type'],
+        'Maintenance Type': t['maintenance_type'],
+        'Primary Frequency': frequency,
+        'Last Done Date': last_done,
+        'Next Due Date': next_due,
+        'Last Done Hrs.': last_done_hrs,
+        'Next Due Hrs.': np.where(hours & triggered, last_done_hrs + t['interval'], np.nan),
+        'Discipline': t['discipline'],
+        'Present Reading': present_reading,
+        'Remaining RHrs per Days': np.round(daily_rate, 1),
+        'Safety Level': np.where(rng.random(n_base) < critical_rate, 'CRITICAL', 'NON-CRITICAL'),
+        'Critical to Safety': t['critical'],
+    }, columns=columns)
+
+    # Injected duplicates: half exact copies, half with a reworded title
+    n_dup = n_jobs - n_base
+    if n_dup > 0:
+        dup = df.iloc[rng.integers(0, n_base, n_dup)].copy()
+        near = rng.random(n_dup) < 0.5
+        dup.loc[near, 'Job Title'] = (dup.loc[near, 'Job Title'].str.upper()
+                                      .str.replace('INSPECTION', 'INSP.', regex=False) + '.')
+        df = pd.concat([df, dup], ignore_index=True)
+    return df
+
+
+def generate_fleet(n_jobs, n_vessels, seed=0, templates=None, **kwargs):
+    # n_jobs in total, split evenly across n_vessels; returns [(vessel, df)]
+    rng = np.random.default_rng(seed)
+    templates = load_templates() if templates is None else templates
+    per_vessel = np.full(n_vessels, n_jobs // n_vessels)
+    per_vessel[:n_jobs % n_vessels] += 1
+    return [(f"SYN VESSEL {i + 1:03d}", generate_vessel(rng, templates, int(n), f"SYN VESSEL {i + 1:03d}", **kwargs))
+            for i, n in enumerate(per_vessel)]
+
+
+def write_fleet(fleet, output_dir, fmt='xlsx'):
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for vessel, df in fleet:
+        path = os.path.join(output_dir, f"{vessel.replace(' ', '_')}.{fmt}")
+        if fmt == 'parquet':
+            df.to_parquet(path, index=False)
+        else:
+            df.to_excel(path, index=False, engine='xlsxwriter')
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Job Overview exports")
+    parser.add_argument('--jobs', type=int, default=10000, help="total jobs across the fleet")
+    parser.add_argument('--vessels', type=int, default=1)
+    parser.add_argument('--format', choices=['xlsx', 'parquet'], default='xlsx')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', default='synthetic_data')
+    args = parser.parse_args()
+
+    fleet = generate_fleet(args.jobs, args.vessels, args.seed)
+    for path in write_fleet(fleet, args.output, args.format):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# Compiled Central Library index.
+#
+# JM.xlsx (the Central Library job master) is compiled once into
+# central_library.npz: a sorted array of its job codes. The series tree stays
+# in data.py, where rollup.py reads it directly.
+# The index is loaded once per process and rebuilt whenever JM.xlsx changes.
+#
+#   python central_library.py        # (re)build the index
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from data import jm_codes
+from prefix_index import prefix_upper_bound
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+JM_PATH = os.path.join(BASE_DIR, 'JM.xlsx')
+INDEX_PATH = os.path.join(BASE_DIR, 'central_library.npz')
+
+
+def source_signature(path=JM_PATH):
+    # (mtime, size) of JM.xlsx; an index built from another signature is stale
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return np.array([0, 0], dtype=np.int64)
+    return np.array([stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+
+
+def build_index(path=JM_PATH, index_path=INDEX_PATH):
+    if os.path.exists(path):
+        codes = pd.read_excel(path, usecols=['Job Code'])['Job Code'].dropna().astype(str).str.strip()
+    else:
+        # Fall back to the job codes bundled in data.py
+        codes = pd.Series(jm_codes)
+    codes = np.unique(codes.to_numpy(dtype=str))
+    # Per-process temporary name: concurrent builders never share a file
+    tmp_path = f"{index_path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, codes=codes, signature=source_signature(path))
+    os.replace(tmp_path, index_path)
+
+
+class CentralLibrary:
+
+    def __init__(self, codes):
+        self.codes = codes
+        self.code_set = frozenset(codes.tolist())
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __contains__(self, code):
+        return code in self.code_set
+
+    def contains(self, job_codes):
+        # Vectorized membership of a Series/array of job codes (NaN -> False)
+        job_codes = pd.Series(job_codes)
+        if isinstance(job_codes.dtype, pd.CategoricalDtype):
+            # Test the categories once and map back through the codes (-1 = NaN)
+            ids = job_codes.cat.codes.to_numpy()
+            found = self.contains(job_codes.cat.categories.astype(str))
+            return np.append(found, False)[ids]
+        values = job_codes.astype(object).where(job_codes.notna(), '').astype(str).to_numpy(dtype=str)
+        if not len(self.codes):
+            return np.zeros(len(values), dtype=bool)
+        pos = np.searchsorted(self.codes, values)
+        found = self.codes[np.minimum(pos, len(self.codes) - 1)] == values
+        return found & (pos < len(self.codes))
+
+    def with_prefix(self, prefix):
+        # All job codes starting with prefix, e.g. with_prefix('GEN-ABLR-')
+        lo = np.searchsorted(self.codes, prefix, side='left')
+        upper = prefix_upper_bound(prefix)
+        hi = len(self.codes) if upper is None else np.searchsorted(self.codes, upper, side='left')
+        return self.codes[lo:hi]
+
+
+def _is_current(signature):
+    if not os.path.exists(INDEX_PATH):
+        return False
+    with np.load(INDEX_PATH) as index:
+        return np.array_equal(index['signature'], signature)
+
+
+@lru_cache(maxsize=1)
+def _load(signature):
+    if not _is_current(signature):
+        build_index()
+    with np.load(INDEX_PATH) as index:
+        return CentralLibrary(index['codes'])
+
+
+def load_central_library():
+    # Cheap to call on every rerun: only a stat of JM.xlsx unless it changed
+    return _load(tuple(source_signature()))
+
+
+if __name__ == "__main__":
+    build_index()
+    print(f"Central Library index written to {INDEX_PATH} ({len(load_central_library())} job codes)")
@@ -0,0 +1,106 @@
+# Comparison of several Job Overview files by equipment code hierarchy.
+#
+# For every equipment code found in any file, count the jobs in each file
+# whose code starts with it. The counts are kept as a dense int32 matrix
+# (codes x files); the "Y(n)" / "N" labels are only rendered for display,
+# and Mismatch, "present in k of n" and per-file coverage are reductions
+# over the matrix.
+import numpy as np
+import pandas as pd
+
+from prefix_index import prefix_upper_bound
+from profiling import stage
+
+
+class Comparison:
+
+    def __init__(self, master_codes, file_names, counts, equipment_names):
+        self.master_codes = master_codes        # sorted array of equipment codes
+        self.file_names = file_names            # matrix columns, in display order
+        self.counts = counts                    # int32 [codes x files]
+        self.equipment_names = equipment_names  # union of Equipment Names per code
+
+    def mismatch(self):
+        # Files disagree when the counts for a code are not all equal
+        if not self.file_names:
+            return np.zeros(len(self.master_codes), dtype=bool)
+        return self.counts.max(axis=1) != self.counts.min(axis=1)
+
+    def present_in(self):
+        # Number of files with at least one matching job, per code
+        return (self.counts > 0).sum(axis=1)
+
+    def coverage(self):
+        # Per file: how many of the master codes it has jobs for
+        present = (self.counts > 0).sum(axis=0)
+        return pd.DataFrame({'File': self.file_names,
+                             'Codes Present': present,
+                             'Coverage %': np.round(100 * present / max(len(self.master_codes), 1), 1)})
+
+    def labels(self, column):
+        counts = self.counts[:, column]
+        return np.where(counts > 0, np.char.add(np.char.add('Y(', counts.astype(str)), ')'), 'N')
+
+    def to_frame(self):
+        # Display frame: Equipment Code, Equipment Name, one Y(n)/N column per file, Mismatch
+        result_df = pd.DataFrame({'Equipment Code': self.master_codes,
+                                  'Equipment Name': self.equipment_names})
+        for column, fn in enumerate(self.file_names):
+            result_df[fn] = self.labels(column)
+        result_df['Present In'] = self.present_in()
+        result_df['Mismatch'] = np.where(self.mismatch(), 'Y', 'N')
+        return result_df
+
+
+def _upper_bounds(codes):
+    # Upper end of each code's prefix range (an empty code matches everything)
+    return np.array([prefix_upper_bound(code) or '\U0010ffff' for code in codes.tolist()], dtype=codes.dtype)
+
+
+def compare_indexes(file_indexes, progress=None):
+    # file_indexes: {file_name: PrefixIndex}, in display order.
+    # progress: optional callable receiving the fraction done.
+    file_names = list(file_indexes.keys())
+    sorted_codes = [np.asarray(index.codes, dtype=str) for index in file_indexes.values()]
+
+    # Union of all equipment codes, sorted for consistent ordering
+    master_codes = np.unique(np.concatenate(sorted_codes)) if sorted_codes else np.array([], dtype=str)
+    upper = _upper_bounds(master_codes)
+
+    counts = np.zeros((len(master_codes), len(file_names)), dtype=np.int32)
+    code_parts, name_parts = [], []
+    with stage('prefix ranges', rows=len(master_codes) * len(file_names)):
+        for column, (fn, codes) in enumerate(zip(file_names, sorted_codes)):
+            index = file_indexes[fn]
+            offsets = np.asarray(index.offsets, dtype=np.int64)
+            # Every master code's [lo, hi) range of file codes in two searchsorted calls
+            lo = np.searchsorted(codes, master_codes, side='left')
+            hi = np.searchsorted(codes, upper, side='left')
+            counts[:, column] = offsets[hi] - offsets[lo]
+            code_parts.append(np.repeat(codes, np.diff(offsets)))
+            name_parts.append(np.array([name for name, _ in index.pairs], dtype=object))
+            if progress is not None:
+                progress((column + 1) / (len(file_names) + 1))
+
+    with stage('equipment name union', rows=len(master_codes)):
+        equipment_names = _equipment_name_union(master_codes, upper, code_parts, name_parts)
+    if progress is not None:
+        progress(1.0)
+    return Comparison(master_codes, file_names, counts, equipment_names)
+
+
+def _equipment_name_union(master_codes, upper, code_parts, name_parts):
+    # Union of the Equipment Names matched by each master code, comma-separated.
+    # Unique (code, name) pairs over all files are sorted by code so each master
+    # code's matches are one contiguous slice; names are factorized in sorted
+    # order so np.unique of a slice is already alphabetical.
+    if not code_parts or not len(master_codes):
+        return [''] * len(master_codes)
+    pairs = pd.DataFrame({'code': np.concatenate(code_parts), 'name': np.concatenate(name_parts)})
+    pairs = pairs.drop_duplicates().sort_values('code', kind='stable')
+    name_ids, names = pd.factorize(pairs['name'], sort=True)
+    codes = pairs['code'].to_numpy(dtype=str)
+    lo = np.searchsorted(codes, master_codes, side='left')
+    hi = np.searchsorted(codes, upper, side='left')
+    names = np.asarray(names, dtype=object)
+    return [", ".join(names[np.unique(name_ids[a:b])]) for a, b in zip(lo.tolist(), hi.tolist())]
@@ -0,0 +1,105 @@
+# Streaming reader for large Job Overview workbooks.
+#
+# openpyxl's read-only mode parses the first sheet (as pd.read_excel does)
+# row by row; only the wanted columns are kept and rows are converted to
+# DataFrames chunk by chunk. read_excel_stream keeps each chunk's columns and
+# joins them one column at a time, releasing that column's chunks as it
+# goes: besides the parser's working set, peak memory is the selected frame
+# plus one column, never the frame twice over (chunk list + concat copy).
+# The header row is validated before any data row is read.
+import io
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+CHUNK_ROWS = 50000
+
+
+class MissingColumnsError(ValueError):
+
+    def __init__(self, missing):
+        self.missing = missing
+        super().__init__(f"missing required columns: {', '.join(missing)}")
+
+
+def _header_names(header):
+    # Same naming as pd.read_excel: blank headers become 'Unnamed: i' and
+    # repeated headers get '.1', '.2', ... suffixes
+    names = []
+    seen = {}
+    for i, name in enumerate(header):
+        name = f"Unnamed: {i}" if name is None else str(name)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def iter_excel_chunks(source, columns=None, required=None, chunk_rows=CHUNK_ROWS):
+    # source: path, bytes or file object of an .xlsx workbook.
+    # columns: wanted columns (missing ones are skipped), None for all.
+    # required: columns that must be in the header, checked before reading rows.
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        names = _header_names(next(rows, ()))
+        missing = [col for col in (required or []) if col not in names]
+        if missing:
+            raise MissingColumnsError(missing)
+        positions = [i for i, name in enumerate(names) if columns is None or name in columns]
+        selected = [names[i] for i in positions]
+
+        chunk = []
+        yielded = False
+        # Blank rows are kept as missing values like pd.read_excel does, except
+        # trailing ones (read-only sheets can report those), so they are only
+        # emitted once a later row has data
+        blank = tuple(None for _ in positions)
+        pending_blank = 0
+        for row in rows:
+            if all(value is None or value == '' for value in row):
+                pending_blank += 1
+                continue
+            chunk.extend([blank] * pending_blank)
+            pending_blank = 0
+            # Empty strings are missing values, as in pd.read_excel
+            chunk.append(tuple(row[i] if i < len(row) and row[i] != '' else None for i in positions))
+            if len(chunk) >= chunk_rows:
+                yield pd.DataFrame.from_records(chunk, columns=selected)
+                yielded = True
+                chunk = []
+        if chunk or not yielded:
+            yield pd.DataFrame.from_records(chunk, columns=selected)
+    finally:
+        workbook.close()
+
+
+def read_excel_stream(source, columns=None, required=None, chunk_rows=CHUNK_ROWS):
+    # iter_excel_chunks always yields at least one (possibly empty) chunk
+    parts = {}
+    for chunk in iter_excel_chunks(source, columns, required, chunk_rows):
+        for col in chunk.columns:
+            # A copy, so a column does not keep the chunk's shared 2D block alive
+            parts.setdefault(col, []).append(chunk[col].copy())
+    del chunk
+    chunked = any(len(series) > 1 for series in parts.values())
+    # Join column by column; pop drops each column's chunks once it is joined
+    df = pd.DataFrame({col: pd.concat(parts.pop(col), ignore_index=True) for col in list(parts)}, copy=False)
+    # A chunk of only blank cells in a column is object dtype; re-infer so the
+    # column matches pd.read_excel (e.g. float with NaN) whatever the chunking
+    if chunked:
+        df = df.infer_objects()
+    # Entirely empty columns are float NaN and other missing values in mixed
+    # columns are NaN rather than None, as in pd.read_excel
+    for col in df.columns:
+        if df[col].dtype == object and df[col].isna().all():
+            df[col] = df[col].astype(float)
+        elif df[col].dtype == object:
+            df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
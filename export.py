@@ -0,0 +1,60 @@
+import io
+from collections import OrderedDict
+
+import pandas as pd
+import xlsxwriter
+
+from profiling import stage
+
+# Built workbooks, memoized per (dataset, export) key; oldest dropped first
+EXPORT_CACHE_SIZE = 8
+# Rows converted to Python values at a time while writing
+EXPORT_CHUNK_ROWS = 10000
+_exports = OrderedDict()
+
+
+def _cells(series):
+    # Python scalars for one column, with missing values as None (empty cell)
+    values = series.astype(object).where(series.notna(), None)
+    return values.tolist()
+
+
+def excel_bytes(sheets):
+    # sheets: list of (sheet_name, df). Rows are streamed in order with
+    # xlsxwriter's constant_memory mode and converted to Python values one
+    # chunk of EXPORT_CHUNK_ROWS at a time, so memory beyond the frames
+    # themselves stays bounded; every sheet is written in a single pass.
+    output = io.BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True, 'nan_inf_to_errors': True})
+    date_format = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'})
+    for sheet_name, df in sheets:
+        worksheet = workbook.add_worksheet(sheet_name[:31])
+        worksheet.write_row(0, 0, [str(col) for col in df.columns])
+        for start in range(0, len(df), EXPORT_CHUNK_ROWS):
+            chunk = df.iloc[start:start + EXPORT_CHUNK_ROWS]
+            columns = [_cells(chunk[col]) for col in chunk.columns]
+            for row_num, row in enumerate(zip(*columns), start=start + 1):
+                for col_num, value in enumerate(row):
+                    if value is None:
+                        continue
+                    if isinstance(value, pd.Timestamp):
+                        worksheet.write_datetime(row_num, col_num, value.to_pydatetime(), date_format)
+                    else:
+                        worksheet.write(row_num, col_num, value)
+    workbook.close()
+    return output.getvalue()
+
+
+def memoized_excel(key, sheets_fn):
+    # sheets_fn returns the (sheet_name, df) list; it is only called (and the
+    # workbook only built) the first time this key is requested
+    if key in _exports:
+        _exports.move_to_end(key)
+        return _exports[key]
+    sheets = sheets_fn()
+    with stage('excel export', rows=sum(len(df) for _, df in sheets)):
+        data = excel_bytes(sheets)
+    _exports[key] = data
+    while len(_exports) > EXPORT_CACHE_SIZE:
+        _exports.popitem(last=False)
+    return data
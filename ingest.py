@@ -0,0 +1,120 @@
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analysis import required_columns, vessel_name
+from excel_stream import MissingColumnsError
+from parse_cache import cache_key, cached_read_excel, is_cached, record_lookup
+from prefix_index import PrefixIndex
+import store
+
+# Columns that must match to consider a row of a Job Overview file a duplicate
+duplicate_columns = ["Equipment Code", "Equipment Name", "Job Code", "Job Title"]
+
+# Only these columns are needed to compare Job Overview files
+compare_columns = duplicate_columns
+
+# One uploaded Job Overview file, parsed once and reused by every step
+JobOverview = namedtuple('JobOverview', ['file_name', 'df', 'duplicates', 'index'])
+
+# Outcome of loading one file: exactly one of overview / error is set.
+# dataset_key identifies the file's content, for caching derived results
+LoadResult = namedtuple('LoadResult', ['name', 'overview', 'error', 'cache_hit', 'dataset_key'])
+
+
+def text_column(df, column, default='Unknown'):
+    # Some files might not have every column (or every cell), so fall back to a constant
+    if column not in df.columns:
+        return np.full(len(df), default, dtype=object)
+    return df[column].fillna(default).astype(str).str.strip().to_numpy(dtype=object)
+
+
+def build_prefix_index(df):
+    # Vectorized eq_code -> [(Equipment Name, Job Title), ...] grouping:
+    # factorize the codes in sorted order, stable-sort the rows by code id
+    # and cut the pair list at the per-code offsets.
+    codes = text_column(df, 'Equipment Code')
+    code_ids, uniques = pd.factorize(codes, sort=True)
+    order = np.argsort(code_ids, kind='stable')
+    names = text_column(df, 'Equipment Name')[order]
+    titles = text_column(df, 'Job Title')[order]
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(code_ids, minlength=len(uniques)))))
+    return PrefixIndex.from_sorted(list(uniques), list(zip(names, titles)), offsets.tolist())
+
+
+def job_overview(file_name, df):
+    # df is kept as parsed (it may also go to the analytics store); the
+    # prefix index does its own code cleanup
+    duplicates = df[df.duplicated(subset=duplicate_columns, keep=False)]
+    return JobOverview(file_name, df, duplicates, build_prefix_index(df))
+
+
+def parse_job_overview(name, data, columns=compare_columns):
+    # Returns (overview, cache_hit)
+    df, hit = cached_read_excel(data, columns)
+    return job_overview(os.path.splitext(name)[0], df), hit
+
+
+def _load_one(args):
+    # Runs in a worker process; a bad file is reported instead of raised
+    name, data, columns = args
+    try:
+        overview, hit = parse_job_overview(name, data, columns)
+        return LoadResult(name, overview, None, hit, cache_key(data, columns))
+    except Exception as e:
+        return LoadResult(name, None, f"{type(e).__name__}: {e}", False, None)
+
+
+def load_job_overviews(job_files, columns=compare_columns, max_workers=None):
+    # Parse the uploaded files in a process pool sized to the available cores.
+    # Results keep the upload order so the comparison columns are deterministic.
+    # columns: analysis.analysis_columns when the frames also go to the store
+    jobs = [(job_file.name, job_file.getvalue(), columns) for job_file in job_files]
+    # Parse-cache hits are only a Parquet read: load them here, so a rerun
+    # with nothing new to parse never starts a pool or ships bytes to workers
+    results = [_load_one(job) if is_cached(job[1], columns) else None for job in jobs]
+    misses = [i for i, result in enumerate(results) if result is None]
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(misses))
+    if max_workers <= 1:
+        parsed = [_load_one(jobs[i]) for i in misses]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            parsed = list(executor.map(_load_one, [jobs[i] for i in misses]))
+    for i, result in zip(misses, parsed):
+        results[i] = result
+    # Cache lookups happen in the workers; count them in this process
+    for result in results:
+        if result.error is None:
+            record_lookup(result.cache_hit)
+    return results
+
+
+def stored_job_overviews(exports):
+    # Job Overviews of exports already in the analytics store (rows of
+    # store.list_exports()), queried by export instead of parsing Excel
+    results = []
+    for export_id, vessel, export_date, ingested in zip(exports['Export'], exports['Vessel'],
+                                                        exports['Export Date'], exports['Ingested']):
+        name = f"{vessel} {export_date:%Y-%m-%d}"
+        dataset_key = f"store-{export_id}-{ingested}"
+        try:
+            df = store.load_export(export_id)[compare_columns]
+            results.append(LoadResult(name, job_overview(name, df), None, False, dataset_key))
+        except Exception as e:
+            results.append(LoadResult(name, None, f"{type(e).__name__}: {e}", False, dataset_key))
+    return results
+
+
+def store_overview(result, export_date):
+    # Append a loaded upload (parsed with the analysis columns) to the
+    # analytics store, tagged by vessel and export date; returns the export id
+    df = result.overview.df
+    missing = [col for col in required_columns if col not in df.columns]
+    if missing:
+        raise MissingColumnsError(missing)
+    return store.save_export(df, vessel_name(df, result.name), export_date, result.name, result.dataset_key)
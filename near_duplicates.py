@@ -0,0 +1,150 @@
+# Near-duplicate job detection.
+#
+# Exact duplicate checks miss jobs whose titles differ only in case,
+# punctuation, whitespace or abbreviations ("Insp." vs "Inspection").
+# Titles are normalized once per distinct title, jobs are blocked by
+# equipment code so only jobs on the same equipment are compared, and
+# within a block only titles sharing a token and carrying the same numbers
+# are scored (character trigram Jaccard), so "Overhaul unit No.1" and
+# "Overhaul unit No.2" stay apart. Matches above the threshold are merged
+# into clusters.
+import re
+
+import numpy as np
+import pandas as pd
+
+# Common PMS abbreviations, expanded before comparing titles
+abbreviations = {
+    'insp': 'inspection', 'inspect': 'inspection', 'chk': 'check', 'chck': 'check',
+    'maint': 'maintenance', 'mnt': 'maintenance', 'o/h': 'overhaul', 'ovhl': 'overhaul',
+    'repl': 'replace', 'replacement': 'replace', 'renew': 'replace', 'svc': 'service',
+    'serv': 'service', 'clng': 'cleaning', 'clean': 'cleaning', 'tst': 'test', 'testing': 'test',
+    'calib': 'calibration', 'cal': 'calibration', 'lub': 'lubrication', 'lube': 'lubrication',
+    'eng': 'engine', 'gen': 'generator', 'aux': 'auxiliary', 'emerg': 'emergency',
+    'mth': 'monthly', 'mthly': 'monthly', 'wkly': 'weekly', 'yrly': 'yearly', 'annual': 'yearly',
+}
+
+# Too common to make two titles candidates on their own
+stopwords = {'a', 'an', 'and', 'of', 'the', 'for', 'to', 'in', 'on', 'at', 'with', 'no'}
+
+_punctuation = re.compile(r'[^\w/]+|(?<!\w)/|/(?!\w)')
+
+
+def normalize_title(title):
+    tokens = _punctuation.sub(' ', str(title).lower()).split()
+    return ' '.join(abbreviations.get(token, token) for token in tokens)
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def numbers(text):
+    # Tokens holding a digit ("1", "no2", "2nd"); they must match exactly
+    return frozenset(token for token in text.split() if any(char.isdigit() for char in token))
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class _DisjointSet:
+
+    def __init__(self, size):
+        self.parent = np.arange(size)
+
+    def find(self, item):
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def _block_pairs(title_ids, titles, grams, threshold):
+    # Scored pairs of distinct normalized titles within one block; only
+    # titles sharing at least one (non stopword) token and the same numbers
+    # become candidates
+    by_token = {}
+    for title_id in title_ids:
+        title_numbers = numbers(titles[title_id])
+        for token in set(titles[title_id].split()) - stopwords:
+            by_token.setdefault((token, title_numbers), []).append(title_id)
+    seen = set()
+    for members in by_token.values():
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                pair = (a, b) if a < b else (b, a)
+                if pair in seen:
+                    continue
+                seen.add(pair)
+                score = jaccard(grams[a], grams[b])
+                if score >= threshold:
+                    yield pair[0], pair[1], score
+
+
+def find_near_duplicates(df, threshold=0.75, block_prefix=None, code_column='Equipment Code',
+                         title_column='Job Title'):
+    # Returns the rows of df that belong to a near-duplicate cluster, with
+    # 'Cluster', 'Score' (best similarity to another member) and
+    # 'Normalized Title' columns, sorted by cluster.
+    # block_prefix: block on the first n characters of the equipment code
+    # (e.g. 2 for the Sub_Series) instead of the full code.
+    # Missing values are filled before factorizing (pandas keeps NaN through
+    # astype(str), and factorize would give them id -1): jobs without a code
+    # share one block, and jobs without a title are never reported
+    codes = df[code_column].fillna('').astype(str).str.strip()
+    if block_prefix is not None:
+        codes = codes.str[:block_prefix]
+    block_ids, _ = pd.factorize(codes)
+    raw_ids, raw_titles = pd.factorize(df[title_column].fillna('').astype(str))
+
+    # Normalize each distinct raw title once, then factorize the results
+    normalized = np.array([normalize_title(title) for title in raw_titles], dtype=object)
+    norm_of_raw, titles = pd.factorize(normalized)
+    title_ids = norm_of_raw[raw_ids] if len(raw_ids) else raw_ids
+    titles = np.asarray(titles, dtype=object)
+
+    # A (block, normalized title) group is already a perfect match
+    groups = pd.DataFrame({'block': block_ids, 'title': title_ids})
+    group_ids = groups.groupby(['block', 'title'], sort=False).ngroup().to_numpy()
+    group_keys = groups.drop_duplicates().reset_index(drop=True)
+    group_sizes = np.bincount(group_ids, minlength=len(group_keys))
+
+    disjoint = _DisjointSet(len(group_keys))
+    best = np.where(group_sizes > 1, 1.0, 0.0)
+    grams = {}
+    for _, block in group_keys.groupby('block', sort=False):
+        if len(block) < 2:
+            continue
+        block_titles = block['title'].tolist()
+        for title_id in block_titles:
+            if title_id not in grams:
+                grams[title_id] = trigrams(titles[title_id])
+        group_of_title = dict(zip(block_titles, block.index))
+        for a, b, score in _block_pairs(block_titles, titles, grams, threshold):
+            ga, gb = group_of_title[a], group_of_title[b]
+            disjoint.union(ga, gb)
+            best[ga] = max(best[ga], score)
+            best[gb] = max(best[gb], score)
+
+    roots = np.array([disjoint.find(g) for g in range(len(group_keys))], dtype=np.int64)
+    row_roots = roots[group_ids] if len(group_ids) else group_ids
+    cluster_sizes = np.bincount(row_roots, minlength=len(group_keys)) if len(row_roots) else np.array([])
+    in_cluster = cluster_sizes[row_roots] > 1 if len(row_roots) else np.zeros(0, dtype=bool)
+    # Blank titles are not near duplicates of each other
+    in_cluster &= titles[title_ids] != ''
+
+    rows = np.flatnonzero(in_cluster)
+    result = df.iloc[rows].copy()
+    result.insert(0, 'Cluster', pd.factorize(row_roots[rows], sort=True)[0] + 1)
+    result.insert(1, 'Score', np.round(best[group_ids[rows]], 3))
+    result['Normalized Title'] = titles[title_ids[rows]]
+    return result.sort_values(['Cluster', 'Score'], ascending=[True, False], kind='stable')
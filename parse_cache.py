@@ -0,0 +1,112 @@
+import hashlib
+import io
+import os
+import tempfile
+
+import pandas as pd
+
+from excel_stream import MissingColumnsError, read_excel_stream
+from profiling import stage
+
+# Parsed workbooks are kept as Parquet files named after the SHA-256 of the
+# uploaded bytes, so Streamlit reruns and re-uploads skip the XLSX parse.
+CACHE_DIR = os.environ.get('MA_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'ma_parse_cache'))
+CACHE_MAX_BYTES = int(os.environ.get('MA_CACHE_MAX_MB', '512')) * 1024 * 1024
+
+# Hit/miss counters for this server process (shown in the apps' sidebar)
+cache_stats = {'hits': 0, 'misses': 0}
+
+
+def cache_key(data, columns=None):
+    digest = hashlib.sha256(data)
+    if columns is not None:
+        digest.update('\0'.join(sorted(columns)).encode())
+    return digest.hexdigest()
+
+
+def cache_path(data, columns=None):
+    return os.path.join(CACHE_DIR, cache_key(data, columns) + '.parquet')
+
+
+def is_cached(data, columns=None):
+    # Whether cached_read_excel(data, columns) would be a cache hit
+    return os.path.exists(cache_path(data, columns))
+
+
+def normalize_types(df):
+    # Excel columns often mix numbers and text (e.g. Equipment Code); Parquet
+    # needs one type per column, so mixed object columns become strings.
+    for col in df.columns:
+        if df[col].dtype == object:
+            values = df[col]
+            df[col] = values.where(values.isna(), values.astype(str))
+    df.columns = [str(col) for col in df.columns]
+    return df
+
+
+def evict(max_bytes=CACHE_MAX_BYTES):
+    # Least recently used first: hits touch the file's mtime
+    entries = []
+    for entry in os.scandir(CACHE_DIR):
+        if entry.name.endswith('.parquet'):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def read_workbook(data, columns=None, required=None):
+    # .xlsx (a zip archive) is streamed with openpyxl read-only; anything
+    # else, e.g. legacy .xls, goes through pd.read_excel
+    if data[:2] == b'PK':
+        return read_excel_stream(data, columns, required)
+    usecols = None if columns is None else (lambda col: col in columns)
+    df = pd.read_excel(io.BytesIO(data), usecols=usecols)
+    missing = [col for col in (required or []) if col not in df.columns]
+    if missing:
+        raise MissingColumnsError(missing)
+    return df
+
+
+def cached_read_excel(data, columns=None, required=None):
+    # Returns (df, hit). columns limits the parse to those columns (missing
+    # ones are tolerated) and is part of the cache key; required columns
+    # raise MissingColumnsError, checked on the header before any data row.
+    path = cache_path(data, columns)
+    df = None
+    if os.path.exists(path):
+        try:
+            with stage('load cached parse') as record:
+                df = pd.read_parquet(path)
+                record.rows = len(df)
+            os.utime(path)
+        except (OSError, ValueError):
+            df = None
+    if df is not None:
+        missing = [col for col in (required or []) if col not in df.columns]
+        if missing:
+            raise MissingColumnsError(missing)
+        return df, True
+
+    with stage('parse excel') as record:
+        df = normalize_types(read_workbook(data, columns, required))
+        record.rows = len(df)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Write under a temporary name so concurrent readers never see a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    evict()
+    return df, False
+
+
+def record_lookup(hit):
+    cache_stats['hits' if hit else 'misses'] += 1
@@ -0,0 +1,51 @@
+import bisect
+
+
+def prefix_upper_bound(prefix):
+    # Smallest string that sorts after every string starting with prefix
+    # (None when the prefix is empty, i.e. everything matches)
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class PrefixIndex:
+    # Sorted equipment codes of one Job Overview file with the
+    # (Equipment Name, Job Title) pairs laid out in the same order, so that
+    # "every code starting with X" is a bisect range instead of a full scan.
+
+    def __init__(self, eq_code_to_pairs):
+        self.codes = sorted(eq_code_to_pairs)
+        self.pairs = []
+        # offsets[i]:offsets[i + 1] are the pairs belonging to codes[i]
+        self.offsets = [0]
+        for code in self.codes:
+            self.pairs.extend(eq_code_to_pairs[code])
+            self.offsets.append(len(self.pairs))
+
+    @classmethod
+    def from_sorted(cls, codes, pairs, offsets):
+        # Build from already sorted codes and pairs laid out by offsets
+        index = cls.__new__(cls)
+        index.codes = codes
+        index.pairs = pairs
+        index.offsets = offsets
+        return index
+
+    def code_range(self, prefix):
+        lo = bisect.bisect_left(self.codes, prefix)
+        upper = prefix_upper_bound(prefix)
+        hi = len(self.codes) if upper is None else bisect.bisect_left(self.codes, upper, lo)
+        return lo, hi
+
+    def count(self, prefix):
+        lo, hi = self.code_range(prefix)
+        return self.offsets[hi] - self.offsets[lo]
+
+    def matched_pairs(self, prefix):
+        lo, hi = self.code_range(prefix)
+        return self.pairs[self.offsets[lo]:self.offsets[hi]]
+
+    def matched_codes(self, prefix):
+        lo, hi = self.code_range(prefix)
+        return self.codes[lo:hi]
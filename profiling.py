@@ -0,0 +1,167 @@
+# Stage-level timing for the analysis pipeline.
+#
+#   tracer = profiling.start(enabled=True)
+#   with profiling.stage('parse') as record:
+#       df = ...
+#       record.rows = len(df)
+#   tracer.to_frame() / tracer.to_json(path) / tracer.to_csv(path)
+#
+# Each stage records wall time, rows processed and peak traced memory.
+# Memory is traced with tracemalloc, which slows allocation-heavy pure
+# Python stages (e.g. openpyxl parsing) while tracing is on; compare traces
+# with each other rather than with untraced runs.
+# Library code calls profiling.stage() unconditionally; while no tracer is
+# enabled (the default) it is a no-op. MA_PROFILE=1 enables tracing without
+# the sidebar, and start(cprofile=True) also wraps the run in cProfile.
+#
+# The current tracer is a context variable, so every thread (each Streamlit
+# session's script run) records into its own tracer. tracemalloc is process
+# wide: it runs while any tracer is enabled, and peaks of stages that
+# overlap with another session's include that session's allocations.
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+
+# Enabled tracers using tracemalloc; it is stopped when the last one stops,
+# unless it was already tracing (python -X tracemalloc) before the first
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_started = False
+
+
+def _acquire_tracemalloc():
+    global _tracemalloc_users, _tracemalloc_started
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_started = True
+        _tracemalloc_users += 1
+
+
+def _release_tracemalloc():
+    global _tracemalloc_users, _tracemalloc_started
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_started:
+            tracemalloc.stop()
+            _tracemalloc_started = False
+
+
+class StageRecord:
+
+    def __init__(self, name, depth=0):
+        self.name = name
+        self.depth = depth
+        self.rows = None
+        self.seconds = 0.0
+        self.peak_mb = 0.0
+        self._base = 0
+        self._peak = 0
+
+    def as_dict(self):
+        return {'stage': self.name, 'depth': self.depth, 'seconds': round(self.seconds, 6), 'rows': self.rows,
+                'rows_per_sec': round(self.rows / self.seconds) if self.rows and self.seconds else None,
+                'peak_mb': round(self.peak_mb, 3)}
+
+
+class Tracer:
+
+    def __init__(self, enabled=False, cprofile=False):
+        self.enabled = enabled
+        self.records = []
+        self._open = []
+        self.profiler = cProfile.Profile() if enabled and cprofile else None
+        self._tracing = enabled
+        if enabled:
+            _acquire_tracemalloc()
+            if self.profiler is not None:
+                self.profiler.enable()
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        record = StageRecord(name, len(self._open))
+        record.rows = rows
+        if not self.enabled:
+            yield record
+            return
+        # Stages may nest: the enclosing stages keep the peak seen so far
+        # before the tracemalloc peak is reset for this one
+        peak = tracemalloc.get_traced_memory()[1]
+        for outer in self._open:
+            outer._peak = max(outer._peak, peak)
+        tracemalloc.reset_peak()
+        record._base = tracemalloc.get_traced_memory()[0]
+        self._open.append(record)
+        self.records.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds = time.perf_counter() - start
+            record._peak = max(record._peak, tracemalloc.get_traced_memory()[1])
+            record.peak_mb = max(record._peak - record._base, 0) / 1024 ** 2
+            self._open.pop()
+            if self._open:
+                self._open[-1]._peak = max(self._open[-1]._peak, record._peak)
+
+    def stop(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self._tracing:
+            _release_tracemalloc()
+            self._tracing = False
+
+    def to_frame(self):
+        return pd.DataFrame([record.as_dict() for record in self.records],
+                            columns=['stage', 'depth', 'seconds', 'rows', 'rows_per_sec', 'peak_mb'])
+
+    def to_json(self, path=None):
+        text = json.dumps([record.as_dict() for record in self.records], indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def to_csv(self, path=None):
+        return self.to_frame().to_csv(path, index=False)
+
+    def profile_stats(self, limit=30):
+        # Top functions by cumulative time, as text
+        if self.profiler is None:
+            return ''
+        output = io.StringIO()
+        pstats.Stats(self.profiler, stream=output).sort_stats('cumulative').print_stats(limit)
+        return output.getvalue()
+
+
+_current = contextvars.ContextVar('profiling_tracer', default=Tracer())
+
+
+def env_enabled():
+    return os.environ.get('MA_PROFILE', '').lower() in ('1', 'true', 'yes')
+
+
+def start(enabled=None, cprofile=False):
+    # Replace this context's tracer; enabled defaults to the MA_PROFILE env var
+    _current.get().stop()
+    tracer = Tracer(env_enabled() if enabled is None else enabled, cprofile)
+    _current.set(tracer)
+    return tracer
+
+
+def current():
+    return _current.get()
+
+
+def stage(name, rows=None):
+    return _current.get().stage(name, rows)
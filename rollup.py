@@ -0,0 +1,98 @@
+# Hierarchical rollup of a prepared Job Overview over the series tree.
+#
+# Every key of data.series_tree ("6", "60", "904", "CEN", ...) is a node;
+# a node's parent is its longest proper prefix that is also a key, so
+# "601.01.001" rolls up into "60" and "6", and "904.." into "9". Jobs are
+# counted once per Equipment Code (total, triggered, overdue, critical)
+# and each node's counts are a prefix range over the sorted codes, taken
+# from cumulative sums. Built once per dataset; drill-down is then a dict
+# lookup for the child nodes and a searchsorted slice for the equipment.
+import numpy as np
+import pandas as pd
+
+from data import series_tree
+from prefix_index import prefix_upper_bound
+from profiling import stage
+
+measures = ['Total', 'Triggered', 'Overdue', 'Critical']
+
+
+def series_parent(key):
+    # Longest proper prefix of key that is itself in the series tree
+    for length in range(len(key) - 1, 0, -1):
+        if key[:length] in series_tree:
+            return key[:length]
+    return ''
+
+
+class SeriesRollup:
+
+    def __init__(self, equipment):
+        # equipment: one row per Equipment Code, sorted by code, with the measures
+        self.equipment = equipment.reset_index(drop=True)
+        self.codes = self.equipment['Equipment Code'].to_numpy(dtype=str)
+        # cumulative[m][i] = sum of measure m over the first i codes
+        self.cumulative = {m: np.concatenate([[0], np.cumsum(self.equipment[m].to_numpy())]) for m in measures}
+        self.nodes = self._build_nodes()
+        # parent key ('' for the top level) -> child keys in code order
+        self.children = {}
+        for key, parent in zip(self.nodes.index, self.nodes['Parent']):
+            self.children.setdefault(parent, []).append(key)
+
+    def _range(self, keys):
+        keys = np.asarray(keys, dtype=str)
+        upper = np.array([prefix_upper_bound(key) for key in keys.tolist()], dtype=str)
+        return np.searchsorted(self.codes, keys, 'left'), np.searchsorted(self.codes, upper, 'left')
+
+    def _build_nodes(self):
+        keys = sorted(series_tree)
+        start, end = self._range(keys)
+        nodes = pd.DataFrame({'Series': keys,
+                              'Series_name': [series_tree[key] for key in keys],
+                              'Parent': [series_parent(key) for key in keys]})
+        nodes['Level'] = [len(self.path(key)) for key in keys]
+        for m in measures:
+            nodes[m] = self.cumulative[m][end] - self.cumulative[m][start]
+        nodes['Equipment'] = end - start
+        return nodes[nodes['Total'] > 0].set_index('Series', drop=False)
+
+    def level(self, parent=''):
+        # Child nodes of `parent` ('' = top level Series) with their counts
+        return self.nodes.loc[self.children.get(parent, [])].reset_index(drop=True)
+
+    def equipment_under(self, key):
+        # Equipment Codes starting with the node key, with their counts
+        start, end = self._range([key])
+        return self.equipment.iloc[start[0]:end[0]]
+
+    def path(self, key):
+        # Node keys from the top level down to `key`
+        keys = []
+        while key:
+            keys.insert(0, key)
+            key = series_parent(key)
+        return keys
+
+
+def build_rollup(df, rows):
+    # df: analysis.prepare_frame output; rows: JobAnalysis.rows
+    with stage('series rollup', rows=len(df)):
+        codes = df['Equipment Code']
+        code_ids = codes.cat.codes.to_numpy()
+        n = len(codes.cat.categories)
+        # Jobs without an Equipment Code (category code -1) are left out
+        counts = {'Total': np.bincount(code_ids[code_ids >= 0], minlength=n)}
+        for m, view in [('Triggered', 'triggered'), ('Overdue', 'overdue'), ('Critical', 'critical_jobs')]:
+            ids = code_ids[rows[view]]
+            counts[m] = np.bincount(ids[ids >= 0], minlength=n)
+        # First Equipment Name seen for each code
+        first = np.full(n, -1)
+        unique_ids, first_rows = np.unique(code_ids, return_index=True)
+        first[unique_ids[unique_ids >= 0]] = first_rows[unique_ids >= 0]
+        present = counts['Total'] > 0
+        equipment = pd.DataFrame({'Equipment Code': codes.cat.categories.astype(str)[present],
+                                  'Equipment Name': df['Equipment Name'].astype(str).to_numpy()[first[present]]})
+        for m in measures:
+            equipment[m] = counts[m][present]
+        equipment = equipment.sort_values('Equipment Code', kind='stable')
+        return SeriesRollup(equipment)
@@ -0,0 +1,146 @@
+# Maintenance schedule engine: frequency parsing and due-date projection.
+#
+#   freq = parse_frequency(df['Primary Frequency'])      interval + unit per job
+#   jobs, dates = project_due_dates(df, today, horizon_days)
+#   forecast = workload_forecast(df, today, horizon_days, period='W')
+#
+# 'Primary Frequency' values look like '12 MONTH', '2 WEEKS', '8000 HOURS' or
+# '0 EVENT'. They are parsed once per distinct string and mapped back to the
+# rows, so parsing costs the same for 1k and 1M jobs. Units are normalized to
+# days ('D'), calendar months ('M'), running hours ('H') or events ('E').
+#
+# Every job is projected forward from its Next Due Date by its interval:
+# calendar months with datetime64[M] arithmetic (the day of month is kept and
+# clipped to the month end), days and weeks as day offsets, and running hours
+# converted to days with the job's 'Remaining RHrs per Days' rate, clipped to
+# (0, 24] hours a day so a bad rate cannot explode the projection. Overdue
+# jobs are assumed to be done today and repeat from there. Event jobs and
+# jobs without a usable interval are not projected.
+import numpy as np
+import pandas as pd
+
+from profiling import stage
+
+# Unit spelling -> (normalized unit, multiplier)
+frequency_units = {
+    'D': ('D', 1), 'DAY': ('D', 1), 'DAYS': ('D', 1),
+    'W': ('D', 7), 'WK': ('D', 7), 'WKS': ('D', 7), 'WEEK': ('D', 7), 'WEEKS': ('D', 7),
+    'M': ('M', 1), 'MTH': ('M', 1), 'MTHS': ('M', 1), 'MONTH': ('M', 1), 'MONTHS': ('M', 1),
+    'Y': ('M', 12), 'YR': ('M', 12), 'YRS': ('M', 12), 'YEAR': ('M', 12), 'YEARS': ('M', 12),
+    'H': ('H', 1), 'HR': ('H', 1), 'HRS': ('H', 1), 'HOUR': ('H', 1), 'HOURS': ('H', 1), 'RHRS': ('H', 1),
+    'EVENT': ('E', 0), 'EVENTS': ('E', 0),
+}
+
+PERIODS = {'W': 'Week', 'M': 'Month'}
+
+
+def parse_frequency(values):
+    # values: Series of frequency strings (categorical or not).
+    # Returns a frame aligned with values: interval (float) and unit
+    # ('D', 'M', 'H', 'E', or missing when the string is not understood)
+    values = pd.Series(values)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        ids, uniques = values.cat.codes.to_numpy(), pd.Index(values.cat.categories)
+    else:
+        ids, uniques = pd.factorize(values)
+    parts = pd.Series(uniques.astype(str)).str.upper().str.extract(r'^\s*(\d+(?:\.\d+)?)\s*([A-Z]+)')
+    units = parts[1].map(frequency_units)
+    interval = pd.to_numeric(parts[0], errors='coerce') * units.str[1]
+    unit = units.str[0]
+    # Missing values (id -1) get the trailing NaN / None
+    interval = np.append(interval.to_numpy(dtype=float), np.nan)[ids]
+    unit = np.append(unit.to_numpy(dtype=object), None)[ids]
+    return pd.DataFrame({'interval': interval, 'unit': unit}, index=values.index)
+
+
+def _days(series):
+    return pd.to_datetime(series, errors='coerce').to_numpy().astype('datetime64[D]')
+
+
+def _numeric(df, column):
+    if column not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+
+
+def _repeat(n):
+    # For counts n, the job position and occurrence number of every occurrence
+    jobs = np.repeat(np.arange(len(n)), n)
+    k = np.arange(len(jobs)) - np.repeat(np.cumsum(n) - n, n)
+    return jobs, k
+
+
+def project_due_dates(df, today, horizon_days=365, freq=None):
+    # Every due date of every job from today to today + horizon_days - 1.
+    # Returns (row positions into df, datetime64[D] due dates), unsorted.
+    # freq: parse_frequency output for df, if already computed
+    if freq is None:
+        freq = parse_frequency(df['Primary Frequency'])
+    interval = freq['interval'].to_numpy()
+    unit = freq['unit'].to_numpy()
+    start = np.datetime64(pd.Timestamp(today).date(), 'D')
+    end = start + np.timedelta64(horizon_days - 1, 'D')
+
+    first = _days(df['Next Due Date'])
+    # A machine runs at most 24 hours a day, which bounds the occurrences of
+    # a job by horizon_days * 24 / interval; jobs without a positive rate
+    # are not projected
+    rate = np.minimum(_numeric(df, 'Remaining RHrs per Days'), 24)
+    hours = (unit == 'H') & (rate > 0)
+    # Running-hour jobs without a due date: remaining hours at the daily rate
+    remaining = _numeric(df, 'Next Due Hrs.') - _numeric(df, 'Present Reading')
+    estimate = hours & np.isnat(first) & np.isfinite(remaining)
+    first[estimate] = start + np.maximum(remaining[estimate] / rate[estimate], 0).astype('timedelta64[D]')
+    first = np.maximum(first, start)
+    due = ~np.isnat(first) & (first <= end) & (interval > 0)
+
+    # Day steps: days, weeks and running hours
+    step = np.where(unit == 'D', interval, np.where(hours, interval / np.where(hours, rate, 1), np.nan))
+    by_day = np.flatnonzero(due & np.isfinite(step))
+    offset = (first[by_day] - start).astype(float)
+    # Due dates fall on whole days: every offset below horizon_days counts
+    # (at most one extra occurrence per job here, dropped by keep)
+    n = np.floor((horizon_days - offset) / step[by_day]).astype(np.int64) + 1
+    jobs, k = _repeat(n)
+    day_dates = start + np.floor(offset[jobs] + k * step[by_day][jobs]).astype('timedelta64[D]')
+    keep = day_dates <= end
+    day_jobs, day_dates = by_day[jobs][keep], day_dates[keep]
+
+    # Month steps: keep the day of month, clipped to the month end
+    by_month = np.flatnonzero(due & (unit == 'M') & (interval >= 1))
+    months = interval[by_month].astype(np.int64)
+    first_month = first[by_month].astype('datetime64[M]')
+    day = (first[by_month] - first_month.astype('datetime64[D]')).astype(np.int64)
+    n = (end.astype('datetime64[M]') - first_month).astype(np.int64) // months + 1
+    jobs, k = _repeat(n)
+    month = first_month[jobs] + (k * months[jobs]).astype('timedelta64[M]')
+    month_days = ((month + 1).astype('datetime64[D]') - month.astype('datetime64[D]')).astype(np.int64)
+    month_dates = month.astype('datetime64[D]') + np.minimum(day[jobs], month_days - 1).astype('timedelta64[D]')
+    keep = month_dates <= end
+    month_jobs, month_dates = by_month[jobs][keep], month_dates[keep]
+
+    return np.concatenate([day_jobs, month_jobs]), np.concatenate([day_dates, month_dates])
+
+
+def period_start(dates, period='W'):
+    # Monday of the week or first day of the month of datetime64[D] dates
+    if period == 'M':
+        return dates.astype('datetime64[M]').astype('datetime64[D]')
+    # 1970-01-01 was a Thursday
+    return dates - ((dates.astype(np.int64) + 3) % 7).astype('timedelta64[D]')
+
+
+def workload_forecast(df, today, horizon_days=365, period='W'):
+    # Jobs due per week ('W') or month ('M') over the horizon, split into
+    # calendar and running-hour jobs. One row per period, empty ones included
+    with stage('workload forecast', rows=len(df)):
+        freq = parse_frequency(df['Primary Frequency'])
+        jobs, dates = project_due_dates(df, today, horizon_days, freq)
+        start = np.datetime64(pd.Timestamp(today).date(), 'D')
+        periods = np.unique(period_start(start + np.arange(horizon_days).astype('timedelta64[D]'), period))
+        bucket = np.searchsorted(periods, period_start(dates, period))
+        hours = freq['unit'].to_numpy()[jobs] == 'H'
+        calendar = np.bincount(bucket[~hours], minlength=len(periods))
+        running = np.bincount(bucket[hours], minlength=len(periods))
+        return pd.DataFrame({PERIODS[period]: pd.to_datetime(periods),
+                             'Calendar': calendar, 'Running Hours': running, 'Total': calendar + running})
@@ -0,0 +1,105 @@
+# Weekly snapshots of a vessel's Job Overview export.
+#
+# Each snapshot keeps only the job key, the tracked fields and the derived
+# Triggered/Overdue flags, stored as snapshots/<vessel>/<export date>.parquet
+# with categorical text columns, so a year of weekly exports stays small.
+import os
+import re
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SNAPSHOT_DIR = os.environ.get('MA_SNAPSHOT_DIR', os.path.join(BASE_DIR, 'snapshots'))
+
+# A job is identified by these columns (plus its occurrence, for duplicates)
+key_columns = ['Equipment Code', 'Job Code', 'Job Title']
+# A job counts as changed when any of these differ between snapshots
+tracked_columns = ['Equipment Name', 'Primary Frequency', 'Last Done Date', 'Next Due Date',
+                   'Safety Level', 'Critical to Safety']
+
+
+def safe_name(name):
+    # File-system safe version of a vessel or file name
+    return re.sub(r'[^\w.-]+', '_', str(name)).strip('_') or 'unknown'
+
+
+def vessel_dir(vessel):
+    return os.path.join(SNAPSHOT_DIR, safe_name(vessel))
+
+
+def snapshot_frame(df, export_date):
+    keys = [col for col in key_columns if col in df.columns]
+    tracked = [col for col in tracked_columns if col in df.columns]
+    snap = df[keys + tracked].copy()
+    for col in keys + tracked:
+        if not pd.api.types.is_datetime64_any_dtype(snap[col]):
+            snap[col] = snap[col].astype(str).astype('category')
+    snap['Row Hash'] = pd.util.hash_pandas_object(snap[tracked], index=False).to_numpy()
+    snap['Triggered'] = df['Last Done Date'].notna().to_numpy()
+    next_due = pd.to_datetime(df['Next Due Date'], errors='coerce')
+    snap['Overdue'] = (next_due < pd.Timestamp(export_date)).to_numpy()
+    return snap.reset_index(drop=True)
+
+
+def save_snapshot(vessel, export_date, snap):
+    path = os.path.join(vessel_dir(vessel), f"{pd.Timestamp(export_date):%Y-%m-%d}.parquet")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    snap.to_parquet(path, index=False)
+    return path
+
+
+def list_snapshots(vessel):
+    # Export dates with a stored snapshot, oldest first
+    try:
+        names = os.listdir(vessel_dir(vessel))
+    except FileNotFoundError:
+        return []
+    return sorted(pd.Timestamp(name[:-len('.parquet')]) for name in names if name.endswith('.parquet'))
+
+
+def load_snapshot(vessel, export_date, columns=None):
+    path = os.path.join(vessel_dir(vessel), f"{pd.Timestamp(export_date):%Y-%m-%d}.parquet")
+    return pd.read_parquet(path, columns=columns)
+
+
+def previous_snapshot(vessel, export_date):
+    # Latest snapshot taken before export_date, as (date, frame), or (None, None)
+    earlier = [date for date in list_snapshots(vessel) if date < pd.Timestamp(export_date)]
+    if not earlier:
+        return None, None
+    return earlier[-1], load_snapshot(vessel, earlier[-1])
+
+
+def load_history(vessel, columns=None):
+    # Every snapshot of a vessel stacked with its Export Date, reading only columns
+    frames = [load_snapshot(vessel, date, columns).assign(**{'Export Date': date})
+              for date in list_snapshots(vessel)]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def _keyed(snap):
+    keys = [col for col in key_columns if col in snap.columns]
+    keyed = snap.copy()
+    for col in keys:
+        keyed[col] = keyed[col].astype(str)
+    keyed['Occurrence'] = keyed.groupby(keys, dropna=False).cumcount()
+    return keyed.set_index(keys + ['Occurrence'])
+
+
+def diff_snapshots(previous, current):
+    # New, removed and changed jobs plus jobs that became overdue since previous
+    prev = _keyed(previous)
+    curr = _keyed(current)
+    in_prev = curr.index.isin(prev.index)
+    common = curr.index[in_prev]
+    changed = curr.loc[common][curr.loc[common, 'Row Hash'].to_numpy() != prev.loc[common, 'Row Hash'].to_numpy()]
+    was_overdue = prev['Overdue'].reindex(curr.index, fill_value=False).to_numpy()
+    delta = {
+        'new': curr[~in_prev],
+        'removed': prev[~prev.index.isin(curr.index)],
+        'changed': changed,
+        'newly_overdue': curr[curr['Overdue'].to_numpy() & ~was_overdue],
+    }
+    return {name: frame.reset_index().drop(columns=['Occurrence', 'Row Hash']) for name, frame in delta.items()}
@@ -0,0 +1,165 @@
+# Local analytics store for Job Overview exports.
+#
+# Every export is appended to one SQLite file (ma_store.sqlite, or
+# MA_STORE_PATH), tagged by vessel and export date, so past exports can be
+# analysed and compared without re-reading the spreadsheets:
+#
+#   export_id = save_export(df, vessel, export_date, file_name)
+#   list_exports() / latest_exports()      one row per stored export
+#   load_export(export_id)                 the export's jobs as a DataFrame
+#   jobs_with_code_prefix('601.01')        Equipment Code range, all vessels
+#   jobs_with_job_code('FIRE-PUMP-INSP')   one job code across the fleet
+#   jobs_due_between(start, end)           Next Due Date range, all vessels
+#
+# Only the analysis columns are stored. Jobs are indexed on Equipment Code,
+# Job Code and Next Due Date, and on (export, Equipment Code) so one
+# export's jobs come back already sorted by code. Dates are ISO strings.
+import datetime
+import os
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from prefix_index import prefix_upper_bound
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_PATH = os.environ.get('MA_STORE_PATH', os.path.join(BASE_DIR, 'ma_store.sqlite'))
+
+# Export column -> store column
+store_columns = {
+    'Equipment Code': 'equipment_code',
+    'Equipment Name': 'equipment_name',
+    'Job Title': 'job_title',
+    'Job Code': 'job_code',
+    'Job Type': 'job_type',
+    'Primary Frequency': 'primary_frequency',
+    'Last Done Date': 'last_done_date',
+    'Next Due Date': 'next_due_date',
+    'Safety Level': 'safety_level',
+    'Critical to Safety': 'critical_to_safety',
+    'Next Due Hrs.': 'next_due_hrs',
+    'Present Reading': 'present_reading',
+    'Remaining RHrs per Days': 'remaining_rhrs_per_days',
+}
+date_columns = ['Last Done Date', 'Next Due Date']
+numeric_columns = ['Next Due Hrs.', 'Present Reading', 'Remaining RHrs per Days']
+
+schema = f"""
+CREATE TABLE IF NOT EXISTS exports (
+    id INTEGER PRIMARY KEY,
+    vessel TEXT NOT NULL,
+    export_date TEXT NOT NULL,
+    file_name TEXT,
+    dataset_key TEXT,
+    jobs INTEGER NOT NULL,
+    ingested_at TEXT NOT NULL,
+    UNIQUE (vessel, export_date)
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    export_id INTEGER NOT NULL REFERENCES exports(id) ON DELETE CASCADE,
+    {', '.join(f"{column} {'REAL' if name in numeric_columns else 'TEXT'}"
+               for name, column in store_columns.items())}
+);
+CREATE INDEX IF NOT EXISTS jobs_export_code ON jobs (export_id, equipment_code);
+CREATE INDEX IF NOT EXISTS jobs_equipment_code ON jobs (equipment_code);
+CREATE INDEX IF NOT EXISTS jobs_job_code ON jobs (job_code);
+CREATE INDEX IF NOT EXISTS jobs_next_due_date ON jobs (next_due_date);
+"""
+
+
+def connect(path=None):
+    # Batch workers write concurrently; wait for the lock instead of failing
+    conn = sqlite3.connect(path or STORE_PATH, timeout=60)
+    conn.execute('PRAGMA foreign_keys = ON')
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.executescript(schema)
+    return conn
+
+
+def _store_values(df, name):
+    # One export column as a list of SQLite values (None for missing)
+    if name not in df.columns:
+        return [None] * len(df)
+    column = df[name]
+    if name in date_columns:
+        dates = pd.to_datetime(column, errors='coerce')
+        return dates.dt.strftime('%Y-%m-%d').astype(object).where(dates.notna(), None).tolist()
+    if name in numeric_columns:
+        numbers = pd.to_numeric(column, errors='coerce')
+        return numbers.astype(object).where(numbers.notna(), None).tolist()
+    return [value if value is None else str(value) for value in column.astype(object).where(column.notna(), None)]
+
+
+def save_export(df, vessel, export_date, file_name=None, dataset_key=None, path=None):
+    # Stores one export; an export already stored for the vessel and date is replaced
+    export_date = pd.Timestamp(export_date).strftime('%Y-%m-%d')
+    values = [_store_values(df, name) for name in store_columns]
+    with closing(connect(path)) as conn, conn:
+        conn.execute('DELETE FROM exports WHERE vessel = ? AND export_date = ?', (vessel, export_date))
+        export_id = conn.execute(
+            'INSERT INTO exports (vessel, export_date, file_name, dataset_key, jobs, ingested_at) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (vessel, export_date, file_name, dataset_key, len(df),
+             datetime.datetime.now().isoformat(timespec='seconds'))).lastrowid
+        conn.executemany(f"INSERT INTO jobs (export_id, {', '.join(store_columns.values())}) "
+                         f"VALUES ({', '.join('?' * (len(store_columns) + 1))})",
+                         zip([export_id] * len(df), *values))
+    return export_id
+
+
+def query(sql, params=(), path=None):
+    # Results with the export column names; date columns as datetimes
+    with closing(connect(path)) as conn:
+        df = pd.read_sql_query(sql, conn, params=params)
+    df = df.rename(columns={column: name for name, column in store_columns.items()})
+    df = df.rename(columns={'vessel': 'Vessel', 'export_date': 'Export Date'})
+    for name in date_columns + ['Export Date']:
+        if name in df.columns:
+            df[name] = pd.to_datetime(df[name])
+    return df
+
+
+def list_exports(path=None):
+    if not os.path.exists(path or STORE_PATH):
+        return pd.DataFrame(columns=['Export', 'Vessel', 'Export Date', 'File', 'Jobs', 'Ingested'])
+    return query('SELECT id AS "Export", vessel, export_date, file_name AS "File", jobs AS "Jobs", '
+                 'ingested_at AS "Ingested" FROM exports ORDER BY vessel, export_date', path=path)
+
+
+def latest_exports(path=None):
+    # The most recent export of every vessel
+    exports = list_exports(path)
+    return exports.drop_duplicates('Vessel', keep='last').reset_index(drop=True)
+
+
+def _select_jobs(where, params, export_ids=None, order='e.vessel, j.equipment_code', path=None):
+    if export_ids is not None:
+        export_ids = [int(export_id) for export_id in export_ids]
+        where += f" AND j.export_id IN ({', '.join('?' * len(export_ids))})"
+        params = tuple(params) + tuple(export_ids)
+    columns = ', '.join(f"j.{column}" for column in store_columns.values())
+    return query(f"SELECT e.vessel, e.export_date, {columns} FROM jobs j JOIN exports e ON e.id = j.export_id "
+                 f"WHERE {where} ORDER BY {order}", params, path)
+
+
+def load_export(export_id, path=None):
+    # Jobs of one export, sorted by Equipment Code
+    return _select_jobs('j.export_id = ?', (int(export_id),), order='j.equipment_code', path=path)
+
+
+def jobs_with_code_prefix(prefix, export_ids=None, path=None):
+    # Equipment Codes starting with prefix, as an index range
+    upper = prefix_upper_bound(prefix) or '\U0010ffff'
+    return _select_jobs('j.equipment_code >= ? AND j.equipment_code < ?', (prefix, upper), export_ids, path=path)
+
+
+def jobs_with_job_code(job_code, export_ids=None, path=None):
+    return _select_jobs('j.job_code = ?', (job_code,), export_ids, path=path)
+
+
+def jobs_due_between(start, end, export_ids=None, path=None):
+    # Jobs with start <= Next Due Date <= end
+    return _select_jobs('j.next_due_date BETWEEN ? AND ?',
+                        (pd.Timestamp(start).strftime('%Y-%m-%d'), pd.Timestamp(end).strftime('%Y-%m-%d')),
+                        export_ids, order='j.next_due_date', path=path)
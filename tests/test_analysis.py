@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import analyze, code_prefix
+from central_library import CentralLibrary
+
+TODAY = pd.Timestamp('2024-06-15').date()
+LIBRARY_CODES = ['GEN-ABLR-INSP', 'GEN-PUMP-OVHL', 'SHIP-GEN-DRILL']
+
+
+def baseline_views(df, today, codes):
+    # The masks MA_Analysis.main() computed before the analysis engine
+    df = df[df['Primary Frequency'] != '0 EVENT'].copy()
+    df['Triggered'] = df['Last Done Date'].apply(lambda x: 'Y' if pd.notnull(x) else 'N')
+    df['Next Due Date'] = pd.to_datetime(df['Next Due Date'], errors='coerce')
+    not_in_library = df[~df['Job Code'].isin(codes)]
+    not_in_library = not_in_library[~not_in_library['Equipment Code'].astype(str).str.startswith('1')]
+    return {
+        'overdue': len(df[df['Next Due Date'].dt.date < today]),
+        'triggered': len(df[df['Triggered'] == 'Y']),
+        'non_triggered': len(df[df['Triggered'] == 'N']),
+        'duplicates': len(df[df.duplicated(subset=['Equipment Code', 'Equipment Name', 'Job Title'], keep=False)]),
+        'critical_equipment': len(df[df['Safety Level'] == 'CRITICAL']),
+        'critical_jobs': len(df[(df['Safety Level'] == 'CRITICAL') & (df['Critical to Safety'] == 'YES')]),
+        'not_in_library': len(not_in_library),
+    }
+
+
+def job_frame(rows):
+    columns = ['Vessel', 'Equipment Code', 'Equipment Name', 'Job Title', 'Job Type', 'Job Code',
+               'Primary Frequency', 'Last Done Date', 'Next Due Date', 'Safety Level', 'Critical to Safety']
+    df = pd.DataFrame(rows, columns=columns)
+    df['Last Done Date'] = pd.to_datetime(df['Last Done Date'])
+    return df
+
+
+@pytest.fixture
+def library():
+    return CentralLibrary(np.array(sorted(LIBRARY_CODES)))
+
+
+@pytest.fixture
+def jobs():
+    return job_frame([
+        ['MV A', '601.01', 'Main Engine', 'Inspect', 'Inspection', 'GEN-ABLR-INSP', '12 MONTH',
+         '2023-06-01', '2024-06-01', 'CRITICAL', 'YES'],
+        # exact duplicate of the first job
+        ['MV A', '601.01', 'Main Engine', 'Inspect', 'Inspection', 'GEN-ABLR-INSP', '12 MONTH',
+         '2023-06-01', '2024-06-01', 'CRITICAL', 'YES'],
+        ['MV A', '651.02', 'Generator', 'Overhaul', 'Overhaul', 'NOT-IN-LIBRARY', '8000 HOURS',
+         None, '2024-07-01', 'CRITICAL', 'NO'],
+        # blank Job Code, blank due date and safety level
+        ['MV A', '801.01', 'Fire Pump', 'Test', 'Test', None, '3 MONTH',
+         '2024-05-01', None, None, None],
+        # ship general jobs are not expected in the Central Library
+        ['MV A', '101.01', 'Drills', 'Fire drill', 'Drill', None, '1 MONTH',
+         '2024-06-01', '2024-07-01', 'NON-CRITICAL', 'NO'],
+        # event jobs are left out of every view
+        ['MV A', '601.02', 'Main Engine', 'Crankcase', 'Inspection', 'GEN-PUMP-OVHL', '0 EVENT',
+         None, '2020-01-01', 'CRITICAL', 'YES'],
+        ['MV A', '731.01', 'Air Compressor', 'Drain', 'Routine', 'GEN-PUMP-OVHL', '1 WEEKS',
+         '2024-06-10', '2024-06-15', 'NON-CRITICAL', 'NO'],
+    ])
+
+
+def random_jobs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    due = pd.Timestamp(TODAY) + pd.to_timedelta(rng.integers(-100, 100, n), unit='D')
+    return job_frame({
+        'Vessel': 'MV R',
+        'Equipment Code': rng.choice(['101.01', '601.01', '601.02', '651.01', '801.03', None], n),
+        'Equipment Name': rng.choice(['Main Engine', 'Generator', None], n),
+        'Job Title': rng.choice(['Inspect', 'Overhaul', 'Test'], n),
+        'Job Type': 'Inspection',
+        'Job Code': rng.choice(LIBRARY_CODES + ['UNKNOWN', None], n),
+        'Primary Frequency': rng.choice(['12 MONTH', '0 EVENT', '500 HOURS'], n),
+        'Last Done Date': np.where(rng.random(n) < 0.7, '2024-01-01', None),
+        'Next Due Date': pd.Series(due).where(rng.random(n) < 0.9),
+        'Safety Level': rng.choice(['CRITICAL', 'NON-CRITICAL', None], n),
+        'Critical to Safety': rng.choice(['YES', 'NO', None], n),
+    })
+
+
+def view_counts(result):
+    return {name: result.count(name) for name in result.rows}
+
+
+def test_views_match_baseline(jobs, library):
+    result = analyze(jobs, TODAY, library)
+    assert view_counts(result) == baseline_views(jobs, TODAY, LIBRARY_CODES)
+    assert view_counts(result) == {'overdue': 2, 'triggered': 5, 'non_triggered': 1, 'duplicates': 2,
+                                   'critical_equipment': 3, 'critical_jobs': 2, 'not_in_library': 2}
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_views_match_baseline_with_missing_values(library, seed):
+    df = random_jobs(500, seed)
+    assert view_counts(analyze(df, TODAY, library)) == baseline_views(df, TODAY, LIBRARY_CODES)
+
+
+def test_blank_job_code(library):
+    # A blank Job Code is not in the Central Library (and must not raise)
+    df = job_frame([['MV A', '601.01', 'Main Engine', 'Inspect', 'Inspection', None, '12 MONTH',
+                     None, '2024-07-01', 'CRITICAL', 'YES'],
+                    ['MV A', '601.02', 'Main Engine', 'Test', 'Inspection', 'GEN-ABLR-INSP', '12 MONTH',
+                     None, '2024-07-01', 'CRITICAL', 'YES'],
+                    ['MV A', '601.03', 'Main Engine', 'Drain', 'Inspection', '', '12 MONTH',
+                     None, '2024-07-01', 'CRITICAL', 'YES']])
+    result = analyze(df, TODAY, library)
+    assert result.rows['not_in_library'].tolist() == [0, 2]
+
+
+def test_code_prefix_keeps_missing_codes_missing():
+    codes = pd.Series(['101.1', None, '102'], dtype='category')
+    assert code_prefix(codes, 1).isna().tolist() == [False, True, False]
+    assert code_prefix(codes, 2).astype(object).where(codes.notna(), None).tolist() == ['10', None, '10']
+
+
+def test_blank_equipment_code_is_not_ship_general(library):
+    # The last category starts with '1': a job without a code must not be taken for ship general
+    df = job_frame([['MV A', '101.1', 'Drills', 'Fire drill', 'Drill', None, '1 MONTH',
+                     None, '2024-07-01', None, None],
+                    ['MV A', None, 'Unassigned', 'Inspect', 'Inspection', None, '1 MONTH',
+                     None, '2024-07-01', None, None],
+                    ['MV A', '102', 'Drills', 'Abandon ship drill', 'Drill', None, '1 MONTH',
+                     None, '2024-07-01', None, None]])
+    assert analyze(df, TODAY, library).rows['not_in_library'].tolist() == [1]
+
+
+def test_event_jobs_and_vessel_are_dropped(jobs, library):
+    result = analyze(jobs, TODAY, library)
+    assert len(result.df) == 6
+    assert 'Vessel' not in result.df.columns
+    assert result.df.columns[0] == 'Triggered'
+
+
+def test_views_are_row_positions(jobs, library):
+    result = analyze(jobs, TODAY, library)
+    overdue = result.view('overdue', ['Equipment Code', 'Job Title'])
+    assert overdue['Equipment Code'].astype(str).tolist() == ['601.01', '601.01']
+    assert result.critical_equipment().tolist() == ['Main Engine', 'Generator']
+
+
+def test_without_library(jobs):
+    assert analyze(jobs, TODAY).count('not_in_library') == 0
@@ -0,0 +1,46 @@
+import io
+import os
+
+import openpyxl
+import pandas as pd
+
+import batch
+import parse_cache
+
+
+def write_workbook(path, rows):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    workbook = openpyxl.Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    workbook.save(path)
+
+
+HEADER = ['Vessel', 'Equipment Code', 'Equipment Name', 'Job Title', 'Job Type', 'Primary Frequency',
+          'Last Done Date', 'Next Due Date']
+
+
+def test_file_names():
+    assert batch.file_names(['exports/MV_A.xlsx', 'exports/MV_B.xlsx']) == ['MV_A', 'MV_B']
+    assert batch.file_names(['exports/MV_A.xlsx', 'archive/2024/MV_A.xlsx']) == ['exports/MV_A',
+                                                                                 'archive/2024/MV_A']
+    # Names that only differ in characters safe_name replaces get a suffix
+    assert batch.file_names(['exports/MV A.xlsx', 'exports/MV_A.xlsx']) == ['MV A', 'MV_A (2)']
+    assert batch.file_names([]) == []
+
+
+def test_inputs_sharing_a_file_name_are_kept_apart(tmp_path, monkeypatch):
+    monkeypatch.setattr(parse_cache, 'CACHE_DIR', str(tmp_path / 'cache'))
+    first = str(tmp_path / 'exports' / 'MV_A.xlsx')
+    second = str(tmp_path / 'archive' / 'MV_A.xlsx')
+    write_workbook(first, [HEADER, ['MV A', '601.01', 'Main Engine', 'Inspect', 'Inspection', '12 MONTH',
+                                    None, None]])
+    write_workbook(second, [HEADER, ['MV A', '651.01', 'Generator', 'Overhaul', 'Overhaul', '12 MONTH',
+                                     None, None]])
+    output = str(tmp_path / 'out')
+    summary, comparison, errors = batch.run([first, second], output, 1, pd.Timestamp('2024-06-15').date(),
+                                            log=io.StringIO())
+    assert errors.empty
+    assert {'exports/MV_A', 'archive/MV_A'} <= set(comparison.columns)
+    assert len(summary) == 2
+    assert sorted(os.listdir(os.path.join(output, 'vessels'))) == ['archive_MV_A.parquet', 'exports_MV_A.parquet']
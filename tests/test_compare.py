@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from compare import compare_indexes
+from ingest import build_prefix_index
+from prefix_index import PrefixIndex
+
+
+def overview(rows):
+    return pd.DataFrame(rows, columns=['Equipment Code', 'Equipment Name', 'Job Title'])
+
+
+FILES = {
+    'vessel_a': overview([['601.01', 'Main Engine', 'Inspect'], ['601.01.01', 'ME Cylinder 1', 'Overhaul'],
+                          ['651.01', 'Generator 1', 'Overhaul'], [' 801.01 ', 'Fire Pump', 'Test']]),
+    'vessel_b': overview([['601.01', 'Main Engine', 'Inspect'], ['651.01', 'Generator 1', 'Overhaul'],
+                          ['651.01', 'Generator 1', 'Clean'], ['731', 'Air Compressor', 'Drain']]),
+    'vessel_c': overview([['601.01', 'Main Eng.', 'Inspect'], [None, None, 'Unassigned']]),
+}
+
+
+def baseline_frame(files):
+    # The nested startswith loops Compare_wip ran before the prefix index
+    file_pairs = {}
+    for fn, df in files.items():
+        pairs = {}
+        for _, row in df.iterrows():
+            pairs.setdefault(str(row['Equipment Code']).strip() if pd.notna(row['Equipment Code']) else 'Unknown',
+                             []).append(str(row['Equipment Name']).strip() if pd.notna(row['Equipment Name'])
+                                        else 'Unknown')
+        file_pairs[fn] = pairs
+    master = sorted(set().union(*file_pairs.values()))
+    rows = []
+    for code in master:
+        row = {'Equipment Code': code}
+        names = set()
+        for fn, pairs in file_pairs.items():
+            matched = [name for file_code, file_names in pairs.items() if file_code.startswith(code)
+                       for name in file_names]
+            row[fn] = f"Y({len(matched)})" if matched else 'N'
+            names.update(matched)
+        row['Equipment Name'] = ", ".join(sorted(names))
+        row['Mismatch'] = 'Y' if len({row[fn] for fn in files}) > 1 else 'N'
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def test_comparison_matches_baseline():
+    comparison = compare_indexes({fn: build_prefix_index(df) for fn, df in FILES.items()})
+    frame = comparison.to_frame()
+    expected = baseline_frame(FILES)
+    columns = ['Equipment Code', 'Equipment Name'] + list(FILES) + ['Mismatch']
+    pd.testing.assert_frame_equal(frame[columns], expected[columns], check_dtype=False)
+
+
+def test_counts_are_prefix_matches():
+    comparison = compare_indexes({fn: build_prefix_index(df) for fn, df in FILES.items()})
+    row = comparison.master_codes.tolist().index('601.01')
+    # '601.01' also matches '601.01.01' in vessel_a
+    assert comparison.counts[row].tolist() == [2, 1, 1]
+    assert comparison.counts.dtype == np.int32
+    assert comparison.present_in()[row] == 3
+
+
+def test_coverage():
+    comparison = compare_indexes({fn: build_prefix_index(df) for fn, df in FILES.items()})
+    coverage = comparison.coverage()
+    assert coverage['File'].tolist() == list(FILES)
+    assert coverage['Codes Present'].tolist() == [4, 3, 2]
+
+
+def test_no_files():
+    comparison = compare_indexes({})
+    assert len(comparison.to_frame()) == 0
+    assert comparison.mismatch().tolist() == []
+
+
+def test_prefix_index_matches_dict_grouping():
+    index = build_prefix_index(FILES['vessel_b'])
+    grouped = PrefixIndex({'601.01': [('Main Engine', 'Inspect')],
+                           '651.01': [('Generator 1', 'Overhaul'), ('Generator 1', 'Clean')],
+                           '731': [('Air Compressor', 'Drain')]})
+    assert index.codes == grouped.codes
+    assert index.matched_pairs('65') == grouped.matched_pairs('65') == [('Generator 1', 'Overhaul'),
+                                                                         ('Generator 1', 'Clean')]
+    assert index.count('') == 4
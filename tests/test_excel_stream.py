@@ -0,0 +1,72 @@
+import datetime
+import io
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from excel_stream import MissingColumnsError, iter_excel_chunks, read_excel_stream
+
+
+def workbook_bytes(rows):
+    workbook = openpyxl.Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+DATA = workbook_bytes([
+    ['Equipment Code', 'Job Title', 'Job Title', None, 'Next Due Date'],
+    ['601.01.001', 'Inspect', 'Inspect again', 1, datetime.datetime(2024, 1, 1)],
+    [None, None, None, None, None],                    # blank row in the middle
+    [None, '', None, 'only the unnamed column', None],  # blank in the selected columns only
+    ['651.01.002', 'Overhaul', None, 2, datetime.datetime(2024, 2, 1)],
+    [None, None, None, None, None],                    # trailing blank row
+])
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 2, 3, 50000])
+@pytest.mark.parametrize('columns', [None, ['Equipment Code', 'Job Title.1', 'Next Due Date']])
+def test_matches_read_excel(columns, chunk_rows):
+    usecols = None if columns is None else (lambda col: col in columns)
+    expected = pd.read_excel(io.BytesIO(DATA), usecols=usecols)
+    pd.testing.assert_frame_equal(read_excel_stream(DATA, columns, chunk_rows=chunk_rows), expected)
+
+
+def test_header_names_follow_read_excel():
+    assert read_excel_stream(DATA).columns.tolist() == ['Equipment Code', 'Job Title', 'Job Title.1',
+                                                        'Unnamed: 3', 'Next Due Date']
+
+
+def test_missing_required_columns():
+    with pytest.raises(MissingColumnsError) as error:
+        read_excel_stream(DATA, required=['Equipment Code', 'Job Type'])
+    assert error.value.missing == ['Job Type']
+
+
+def test_chunks():
+    chunks = list(iter_excel_chunks(DATA, ['Equipment Code'], chunk_rows=2))
+    assert len(chunks) == 2
+    assert pd.concat(chunks)['Equipment Code'].isna().tolist() == [False, True, True, False]
+
+
+def test_header_only():
+    df = read_excel_stream(workbook_bytes([['Equipment Code', 'Job Title']]))
+    assert df.columns.tolist() == ['Equipment Code', 'Job Title'] and df.empty
+
+
+def test_reads_the_first_sheet_like_read_excel():
+    workbook = openpyxl.Workbook()
+    workbook.active.append(['Equipment Code', 'Job Title'])
+    workbook.active.append(['601.01.001', 'Inspect'])
+    notes = workbook.create_sheet('Notes')
+    notes.append(['note'])
+    notes.append(['saved with this sheet selected'])
+    workbook.active = notes
+    output = io.BytesIO()
+    workbook.save(output)
+    data = output.getvalue()
+    pd.testing.assert_frame_equal(read_excel_stream(data), pd.read_excel(io.BytesIO(data)))
+    assert read_excel_stream(data).columns.tolist() == ['Equipment Code', 'Job Title']
@@ -0,0 +1,60 @@
+import io
+
+import openpyxl
+import pytest
+
+import parse_cache
+import store
+from analysis import analysis_columns
+from excel_stream import MissingColumnsError
+from ingest import load_job_overviews, store_overview
+
+
+class Upload:
+    # The parts of a Streamlit UploadedFile that ingest uses
+
+    def __init__(self, name, rows):
+        workbook = openpyxl.Workbook()
+        for row in rows:
+            workbook.active.append(row)
+        output = io.BytesIO()
+        workbook.save(output)
+        self.name = name
+        self.data = output.getvalue()
+
+    def getvalue(self):
+        return self.data
+
+
+HEADER = ['Vessel', 'Equipment Code', 'Equipment Name', 'Job Title', 'Job Code', 'Job Type', 'Next Due Date']
+VALID = Upload('mv_a.xlsx', [HEADER, ['MV A', '601.01', 'Main Engine', 'Inspect', 'ME-INSP', 'Inspection', None],
+                             ['MV A', None, 'Unassigned', 'Check', None, 'Check', None]])
+# Fine for comparing, but without the 'Job Type' the analysis needs
+NO_JOB_TYPE = Upload('mv_b.xlsx', [HEADER[:5], ['MV B', '601.01', 'Main Engine', 'Inspect', 'ME-INSP']])
+
+
+@pytest.fixture(autouse=True)
+def tmp_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(parse_cache, 'CACHE_DIR', str(tmp_path / 'cache'))
+
+
+def test_load_job_overviews():
+    results = load_job_overviews([VALID, NO_JOB_TYPE, Upload('empty.xlsx', [])], max_workers=1)
+    assert [result.error is None for result in results] == [True, True, True]
+    assert [result.overview.file_name for result in results] == ['mv_a', 'mv_b', 'empty']
+    assert results[0].overview.index.codes == ['601.01', 'Unknown']
+    # The parsed frame is kept as read
+    assert results[0].overview.df['Equipment Code'].isna().tolist() == [False, True]
+    assert load_job_overviews([VALID], max_workers=1)[0].cache_hit
+
+
+def test_store_reuses_the_parsed_frame(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, 'STORE_PATH', str(tmp_path / 'store.sqlite'))
+    valid, no_job_type = load_job_overviews([VALID, NO_JOB_TYPE], analysis_columns, max_workers=1)
+    export_id = store_overview(valid, '2024-06-01')
+    jobs = store.load_export(export_id)
+    assert jobs['Vessel'].tolist() == ['MV A', 'MV A']
+    assert jobs['Equipment Code'].isna().tolist() == [True, False]
+    assert store.list_exports()['File'].tolist() == ['mv_a.xlsx']
+    with pytest.raises(MissingColumnsError):
+        store_overview(no_job_type, '2024-06-01')
@@ -0,0 +1,71 @@
+import pandas as pd
+
+from near_duplicates import find_near_duplicates, normalize_title
+
+
+def jobs(rows):
+    return pd.DataFrame(rows, columns=['Equipment Code', 'Equipment Name', 'Job Title'])
+
+
+def clusters(result):
+    return sorted(sorted(group['Job Title']) for _, group in result.groupby('Cluster'))
+
+
+def test_normalize_title():
+    assert normalize_title('  Insp.  of M/E  Turbo-Charger ') == 'inspection of m/e turbo charger'
+    assert normalize_title('O/H Aux. Eng.') == 'overhaul auxiliary engine'
+
+
+def test_case_punctuation_and_abbreviations_cluster():
+    df = jobs([['601.01', 'ME', 'Insp. of Turbocharger'], ['601.01', 'ME', 'INSPECTION OF TURBOCHARGER'],
+               ['601.01', 'ME', 'Inspection of turbocharger.'], ['601.01', 'ME', 'Change lube oil filter']])
+    result = find_near_duplicates(df)
+    assert clusters(result) == [['INSPECTION OF TURBOCHARGER', 'Insp. of Turbocharger',
+                                 'Inspection of turbocharger.']]
+    assert result['Score'].tolist() == [1.0, 1.0, 1.0]
+
+
+def test_numbered_units_stay_apart():
+    df = jobs([['601.01', 'ME', 'Overhaul cylinder unit No.1'], ['601.01', 'ME', 'Overhaul cylinder unit No.2'],
+               ['601.01', 'ME', 'O/H cylinder unit no 1'], ['601.01', 'ME', 'Overhaul cylinder unit']])
+    assert clusters(find_near_duplicates(df, threshold=0.5)) == [['O/H cylinder unit no 1',
+                                                                  'Overhaul cylinder unit No.1']]
+
+
+def test_threshold():
+    df = jobs([['601.01', 'ME', 'Check fuel pump'], ['601.01', 'ME', 'Check fuel pumps']])
+    assert len(find_near_duplicates(df, threshold=0.75)) == 2
+    assert find_near_duplicates(df, threshold=1.0).empty
+
+
+def test_blocks_on_equipment_code():
+    df = jobs([['601.01', 'ME', 'Inspect filter'], ['601.02', 'ME', 'Insp. filter'],
+               ['651.01', 'GE', 'Inspect filter'], [' 601.01 ', 'ME', 'inspect filter']])
+    assert clusters(find_near_duplicates(df)) == [['Inspect filter', 'inspect filter']]
+
+
+def test_block_prefix():
+    df = jobs([['601.01', 'ME', 'Inspect filter'], ['601.02', 'ME', 'Insp. filter'],
+               ['651.01', 'GE', 'Inspect filter']])
+    # Blocking on the Sub-Series (first two characters) compares 601.01 with 601.02 only
+    assert clusters(find_near_duplicates(df, block_prefix=2)) == [['Insp. filter', 'Inspect filter']]
+    # and on the Series, all three
+    assert clusters(find_near_duplicates(df, block_prefix=1)) == [['Insp. filter', 'Inspect filter',
+                                                                   'Inspect filter']]
+
+
+def test_no_duplicates():
+    df = jobs([['601.01', 'ME', 'Inspect filter'], ['601.01', 'ME', 'Change oil']])
+    result = find_near_duplicates(df)
+    assert result.empty
+    assert list(result.columns) == ['Cluster', 'Score', 'Equipment Code', 'Equipment Name', 'Job Title',
+                                    'Normalized Title']
+    assert find_near_duplicates(df.iloc[:0]).empty
+
+
+def test_missing_titles_and_codes():
+    df = jobs([['601.01', 'ME', 'Inspect filter'], ['601.01', 'ME', None], ['601.01', 'ME', None],
+               [None, 'ME', 'Change oil'], [None, 'ME', 'change oil.'], ['651.01', 'GE', 'Check']])
+    # A blank title is nobody's duplicate; jobs without a code share one block
+    assert clusters(find_near_duplicates(df)) == [['Change oil', 'change oil.']]
+    assert find_near_duplicates(jobs([['601.01', 'ME', None], ['601.01', 'ME', None]])).empty
@@ -0,0 +1,77 @@
+import threading
+import tracemalloc
+
+import profiling
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = profiling.start(False)
+    with profiling.stage('parse', rows=10) as record:
+        pass
+    assert record.rows == 10
+    assert tracer.to_frame().empty
+    assert not tracemalloc.is_tracing()
+
+
+def test_nested_stages():
+    tracer = profiling.start(True)
+    with profiling.stage('outer', rows=2):
+        with profiling.stage('inner') as record:
+            record.rows = 1
+            data = [0] * 100000
+    tracer.stop()
+    frame = tracer.to_frame()
+    assert frame['stage'].tolist() == ['outer', 'inner']
+    assert frame['depth'].tolist() == [0, 1]
+    assert frame['rows'].tolist() == [2, 1]
+    assert (frame['peak_mb'] > 0).all()
+    assert len(data) == 100000
+    profiling.start(False)
+
+
+def test_tracers_are_per_thread():
+    # Two sessions tracing at once: each records only its own stages, and
+    # tracemalloc keeps running until the last tracer stops
+    started = threading.Barrier(2)
+    first_stopped = threading.Event()
+    tracers = {}
+
+    def session(name):
+        tracer = profiling.start(True)
+        tracers[name] = tracer
+        started.wait()
+        with profiling.stage(name):
+            pass
+        if name == 'first':
+            tracer.stop()
+            first_stopped.set()
+        else:
+            first_stopped.wait()
+            tracers['tracing after first stopped'] = tracemalloc.is_tracing()
+            tracer.stop()
+
+    threads = [threading.Thread(target=session, args=(name,)) for name in ['first', 'second']]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert tracers['first'].to_frame()['stage'].tolist() == ['first']
+    assert tracers['second'].to_frame()['stage'].tolist() == ['second']
+    assert tracers['tracing after first stopped']
+    assert not tracemalloc.is_tracing()
+    # This thread's tracer was never replaced
+    assert not profiling.current().enabled
+
+
+def test_start_replaces_the_current_tracer():
+    first = profiling.start(True)
+    second = profiling.start(True)
+    assert profiling.current() is second
+    with profiling.stage('load'):
+        pass
+    second.stop()
+    second.stop()
+    assert first.to_frame().empty
+    assert second.to_frame()['stage'].tolist() == ['load']
+    assert not tracemalloc.is_tracing()
+    profiling.start(False)
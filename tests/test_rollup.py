@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from analysis import analyze
+from data import series_tree
+from rollup import series_parent
+
+TODAY = pd.Timestamp('2024-06-15').date()
+
+
+def jobs(rows):
+    df = pd.DataFrame(rows, columns=['Equipment Code', 'Equipment Name', 'Job Title', 'Job Type',
+                                     'Primary Frequency', 'Last Done Date', 'Next Due Date', 'Safety Level',
+                                     'Critical to Safety'])
+    df['Last Done Date'] = pd.to_datetime(df['Last Done Date'])
+    return df
+
+
+JOBS = jobs([
+    ['601.01', 'Main Engine', 'Inspect', 'Inspection', '12 MONTH', '2023-06-01', '2024-06-01', 'CRITICAL', 'YES'],
+    ['601.01', 'Main Engine', 'Overhaul', 'Overhaul', '8000 HOURS', None, '2024-07-01', 'CRITICAL', 'NO'],
+    ['601.02', 'ME Turbocharger', 'Clean', 'Cleaning', '3 MONTH', '2024-05-01', '2024-08-01', None, None],
+    ['651.01', 'Generator 1', 'Overhaul', 'Overhaul', '8000 HOURS', '2024-01-01', '2024-03-01', 'CRITICAL', 'YES'],
+    ['801.01', 'Fire Pump', 'Test', 'Test', '1 MONTH', '2024-06-01', '2024-07-01', 'NON-CRITICAL', 'NO'],
+    [None, 'Unassigned', 'Check', 'Check', '1 MONTH', None, '2024-01-01', None, None],
+    ['601.03', 'Main Engine', 'Crankcase', 'Inspection', '0 EVENT', None, None, None, None],
+])
+
+
+def brute_force(result, key):
+    # Counts of the jobs whose Equipment Code starts with key
+    df = result.df
+    codes = df['Equipment Code'].astype(str)
+    under = (df['Equipment Code'].notna() & codes.str.startswith(key)).to_numpy()
+    counts = {'Total': int(under.sum())}
+    for m, view in [('Triggered', 'triggered'), ('Overdue', 'overdue'), ('Critical', 'critical_jobs')]:
+        counts[m] = int(under[result.rows[view]].sum())
+    return counts
+
+
+def test_series_parent():
+    assert series_parent('6') == ''
+    assert series_parent('60') == '6'
+    assert series_parent('601.01.001') == '60'
+    assert series_parent('CEN') == ''
+    for key in series_tree:
+        parent = series_parent(key)
+        assert parent == '' or (parent in series_tree and key.startswith(parent) and parent != key)
+
+
+def test_levels_match_prefix_counts():
+    result = analyze(JOBS, TODAY)
+    rollup = result.rollup()
+    assert result.rollup() is rollup
+    top = rollup.level()
+    assert top['Series'].tolist() == ['6', '8']
+    assert top['Series_name'].tolist() == [series_tree['6'], series_tree['8']]
+    for parent in ['', '6', '8']:
+        for _, node in rollup.level(parent).iterrows():
+            assert node['Parent'] == parent
+            assert node[['Total', 'Triggered', 'Overdue', 'Critical']].to_dict() == brute_force(result, node['Series'])
+    assert rollup.level('6')['Series'].tolist() == ['60', '65']
+    assert rollup.level('60').empty
+
+
+def test_equipment_under():
+    rollup = analyze(JOBS, TODAY).rollup()
+    equipment = rollup.equipment_under('60')
+    assert equipment['Equipment Code'].tolist() == ['601.01', '601.02']
+    assert equipment['Equipment Name'].tolist() == ['Main Engine', 'ME Turbocharger']
+    assert equipment['Total'].tolist() == [2, 1]
+    assert equipment['Critical'].tolist() == [1, 0]
+    assert rollup.equipment_under('7').empty
+
+
+def test_path_and_levels():
+    rollup = analyze(JOBS, TODAY).rollup()
+    assert rollup.path('60') == ['6', '60']
+    assert rollup.path('') == []
+    nodes = rollup.nodes.set_index('Series')
+    assert nodes.loc['6', 'Level'] == 1 and nodes.loc['65', 'Level'] == 2
+    assert np.all(nodes['Equipment'] > 0)
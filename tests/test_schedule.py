@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from schedule import parse_frequency, period_start, project_due_dates, workload_forecast
+
+TODAY = pd.Timestamp('2024-01-01')
+
+
+def jobs(rows):
+    return pd.DataFrame(rows, columns=['Primary Frequency', 'Next Due Date', 'Remaining RHrs per Days',
+                                       'Next Due Hrs.', 'Present Reading'])
+
+
+def due_dates(df, horizon_days=365):
+    positions, dates = project_due_dates(df, TODAY, horizon_days)
+    order = np.lexsort((dates, positions))
+    return [(int(p), str(d)) for p, d in zip(positions[order], dates[order])]
+
+
+@pytest.mark.parametrize('categorical', [False, True])
+def test_parse_frequency(categorical):
+    values = pd.Series(['12 MONTH', '2 WEEKS', '8000 HOURS', '0 EVENT', '1 year', ' 30 DAYS', 'ON CONDITION',
+                        None, '12 MONTH'])
+    if categorical:
+        values = values.astype('category')
+    freq = parse_frequency(values)
+    assert freq['unit'].fillna('-').tolist() == ['M', 'D', 'H', 'E', 'M', 'D', '-', '-', 'M']
+    np.testing.assert_array_equal(freq['interval'], [12, 14, 8000, 0, 12, 30, np.nan, np.nan, 12])
+
+
+def test_month_steps_keep_the_day_clipped_to_the_month_end():
+    df = jobs([['1 MONTH', '2024-01-31', None, None, None]])
+    assert [date for _, date in due_dates(df, 121)] == ['2024-01-31', '2024-02-29', '2024-03-31', '2024-04-30']
+
+
+def test_day_and_week_steps():
+    df = jobs([['10 DAYS', '2024-01-05', None, None, None], ['2 WEEKS', '2024-01-01', None, None, None]])
+    assert due_dates(df, 30) == [(0, '2024-01-05'), (0, '2024-01-15'), (0, '2024-01-25'),
+                                 (1, '2024-01-01'), (1, '2024-01-15'), (1, '2024-01-29')]
+
+
+def test_overdue_jobs_are_done_today():
+    df = jobs([['1 WEEK', '2023-11-20', None, None, None]])
+    assert due_dates(df, 15) == [(0, '2024-01-01'), (0, '2024-01-08'), (0, '2024-01-15')]
+
+
+def test_running_hours():
+    df = jobs([
+        ['500 HOURS', '2024-01-03', 20, None, None],
+        # no due date: estimated from the remaining hours at the daily rate
+        ['1000 HOURS', None, 10, 1500, 1000],
+        # without a rate the job is not projected
+        ['500 HOURS', '2024-01-03', None, None, None],
+    ])
+    assert due_dates(df, 80) == [(0, '2024-01-03'), (0, '2024-01-28'), (0, '2024-02-22'), (0, '2024-03-18'),
+                                 (1, '2024-02-20')]
+
+
+def test_running_hour_rate_is_clipped_to_24_hours_a_day():
+    df = jobs([['24 HOURS', '2024-01-01', 1e9, None, None], ['24 HOURS', '2024-01-01', 24, None, None]])
+    positions, dates = project_due_dates(df, TODAY, 10)
+    assert np.bincount(positions).tolist() == [10, 10]
+    assert (dates <= np.datetime64('2024-01-10')).all()
+
+
+def test_event_and_unknown_jobs_are_not_projected():
+    df = jobs([['0 EVENT', '2024-01-02', None, None, None], ['ON CONDITION', '2024-01-02', None, None, None],
+               ['1 MONTH', None, None, None, None], ['1 MONTH', '2025-06-01', None, None, None]])
+    assert due_dates(df) == []
+
+
+def test_period_start():
+    dates = np.array(['2024-01-01', '2024-01-07', '2024-01-08', '2024-02-29'], dtype='datetime64[D]')
+    assert period_start(dates, 'W').astype(str).tolist() == ['2024-01-01', '2024-01-01', '2024-01-08',
+                                                             '2024-02-26']
+    assert period_start(dates, 'M').astype(str).tolist() == ['2024-01-01', '2024-01-01', '2024-01-01',
+                                                             '2024-02-01']
+
+
+def test_workload_forecast():
+    df = jobs([['1 WEEK', '2024-01-01', None, None, None], ['1 MONTH', '2024-01-15', None, None, None],
+               ['240 HOURS', '2024-01-10', 24, None, None]])
+    forecast = workload_forecast(df, TODAY, 60, 'M')
+    assert forecast['Month'].dt.strftime('%Y-%m').tolist() == ['2024-01', '2024-02']
+    assert forecast['Calendar'].tolist() == [5 + 1, 4 + 1]
+    assert forecast['Running Hours'].tolist() == [3, 3]
+    assert (forecast['Total'] == forecast['Calendar'] + forecast['Running Hours']).all()
+    weekly = workload_forecast(df, TODAY, 60, 'W')
+    assert weekly['Week'].dt.dayofweek.eq(0).all()
+    assert weekly['Total'].sum() == forecast['Total'].sum()
@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+import snapshots
+from snapshots import diff_snapshots, list_snapshots, load_history, previous_snapshot, save_snapshot, snapshot_frame
+
+
+def export(rows):
+    df = pd.DataFrame(rows, columns=['Equipment Code', 'Job Code', 'Job Title', 'Equipment Name',
+                                     'Primary Frequency', 'Last Done Date', 'Next Due Date'])
+    df['Last Done Date'] = pd.to_datetime(df['Last Done Date'])
+    df['Next Due Date'] = pd.to_datetime(df['Next Due Date'])
+    return df
+
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, 'SNAPSHOT_DIR', str(tmp_path))
+
+
+WEEK_1 = export([
+    ['601.01', 'ME-INSP', 'Inspect', 'Main Engine', '12 MONTH', '2024-01-01', '2024-06-20'],
+    ['601.01', 'ME-INSP', 'Inspect', 'Main Engine', '12 MONTH', '2024-01-01', '2024-06-20'],
+    ['651.01', 'GE-OVHL', 'Overhaul', 'Generator', '8000 HOURS', None, '2024-07-01'],
+    ['801.01', 'FP-TEST', 'Test', 'Fire Pump', '3 MONTH', '2024-03-01', '2024-06-01'],
+])
+WEEK_2 = export([
+    ['601.01', 'ME-INSP', 'Inspect', 'Main Engine', '12 MONTH', '2024-01-01', '2024-06-20'],
+    ['601.01', 'ME-INSP', 'Inspect', 'Main Engine', '12 MONTH', '2024-01-01', '2024-06-20'],
+    ['651.01', 'GE-OVHL', 'Overhaul', 'Generator', '6000 HOURS', None, '2024-07-01'],
+    ['731.01', 'AC-DRN', 'Drain', 'Air Compressor', '1 WEEKS', '2024-06-18', '2024-06-25'],
+])
+
+
+def test_diff_snapshots():
+    previous = snapshot_frame(WEEK_1, '2024-06-15')
+    current = snapshot_frame(WEEK_2, '2024-06-22')
+    delta = diff_snapshots(previous, current)
+    assert delta['new']['Job Code'].tolist() == ['AC-DRN']
+    assert delta['removed']['Job Code'].tolist() == ['FP-TEST']
+    assert delta['changed']['Job Code'].tolist() == ['GE-OVHL']
+    # Both copies of the duplicated job passed their due date between the exports
+    assert delta['newly_overdue']['Job Code'].tolist() == ['ME-INSP', 'ME-INSP']
+
+
+def test_identical_exports_have_no_changes():
+    snap = snapshot_frame(WEEK_1, '2024-06-15')
+    delta = diff_snapshots(snap, snapshot_frame(WEEK_1, '2024-06-15'))
+    assert all(frame.empty for frame in delta.values())
+
+
+def test_snapshot_frame_flags():
+    snap = snapshot_frame(WEEK_1, '2024-06-15')
+    assert snap['Triggered'].tolist() == [True, True, False, True]
+    assert snap['Overdue'].tolist() == [False, False, False, True]
+
+
+def test_save_and_load_history():
+    save_snapshot('MV A/B', '2024-06-22', snapshot_frame(WEEK_2, '2024-06-22'))
+    save_snapshot('MV A/B', '2024-06-15', snapshot_frame(WEEK_1, '2024-06-15'))
+    assert list_snapshots('MV A/B') == [pd.Timestamp('2024-06-15'), pd.Timestamp('2024-06-22')]
+    date, previous = previous_snapshot('MV A/B', '2024-06-22')
+    assert date == pd.Timestamp('2024-06-15') and len(previous) == 4
+    assert previous_snapshot('MV A/B', '2024-06-15') == (None, None)
+    history = load_history('MV A/B', ['Job Code', 'Overdue'])
+    assert history.groupby('Export Date').size().tolist() == [4, 4]
+    assert list_snapshots('Other vessel') == []
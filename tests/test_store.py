@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import store
+from analysis import analyze
+
+
+def export(rows):
+    return pd.DataFrame(rows, columns=['Equipment Code', 'Equipment Name', 'Job Title', 'Job Code', 'Job Type',
+                                       'Primary Frequency', 'Last Done Date', 'Next Due Date', 'Safety Level',
+                                       'Critical to Safety', 'Remaining RHrs per Days'])
+
+
+VESSEL_A = export([
+    ['651.01', 'Generator 1', 'Overhaul', 'GEN-OVHL', 'Overhaul', '8000 HOURS', None, '2024-07-01',
+     'CRITICAL', 'NO', 12.5],
+    ['601.01', 'Main Engine', 'Inspect', 'FIRE-PUMP-INSP', 'Inspection', '12 MONTH', '2023-06-01', '2024-06-01',
+     'CRITICAL', 'YES', None],
+    ['601.01.001', 'ME Cylinder 1', 'Overhaul', None, 'Overhaul', '3 MONTH', '2024-05-01', None, None, None, None],
+])
+VESSEL_B = export([
+    ['601.02', 'ME Turbocharger', 'Clean', 'FIRE-PUMP-INSP', 'Cleaning', '1 MONTH', '2024-05-15', '2024-06-15',
+     'NON-CRITICAL', 'NO', None],
+])
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'store.sqlite')
+
+
+def test_empty_store(path):
+    exports = store.list_exports(path)
+    assert exports.empty
+    assert list(exports.columns) == ['Export', 'Vessel', 'Export Date', 'File', 'Jobs', 'Ingested']
+
+
+def test_save_and_load(path):
+    export_id = store.save_export(VESSEL_A, 'MV A', '2024-06-01', 'a.xlsx', 'key', path=path)
+    jobs = store.load_export(export_id, path)
+    assert jobs['Equipment Code'].tolist() == ['601.01', '601.01.001', '651.01']
+    assert jobs['Vessel'].unique().tolist() == ['MV A']
+    assert jobs['Export Date'].unique().tolist() == [pd.Timestamp('2024-06-01')]
+    assert jobs['Next Due Date'].tolist()[:2] == [pd.Timestamp('2024-06-01'), pd.NaT]
+    assert jobs['Job Code'].isna().tolist() == [False, True, False]
+    assert jobs['Remaining RHrs per Days'].tolist()[2] == 12.5
+    # Columns missing from the export are stored empty
+    assert jobs['Present Reading'].isna().all()
+
+
+def test_same_vessel_and_date_is_replaced(path):
+    store.save_export(VESSEL_A, 'MV A', '2024-06-01', path=path)
+    export_id = store.save_export(VESSEL_A.iloc[:1], 'MV A', '2024-06-01', path=path)
+    exports = store.list_exports(path)
+    assert exports['Export'].tolist() == [export_id]
+    assert exports['Jobs'].tolist() == [1]
+    # The replaced export's jobs are deleted with it
+    assert store.query('SELECT COUNT(*) AS jobs FROM jobs', path=path)['jobs'].tolist() == [1]
+    assert store.load_export(export_id, path)['Equipment Code'].tolist() == ['651.01']
+
+
+def test_list_and_latest_exports(path):
+    store.save_export(VESSEL_A, 'MV A', '2024-06-01', path=path)
+    store.save_export(VESSEL_B, 'MV B', '2024-05-01', path=path)
+    store.save_export(VESSEL_A.iloc[:2], 'MV A', '2024-05-01', path=path)
+    exports = store.list_exports(path)
+    assert list(zip(exports['Vessel'], exports['Export Date'].dt.strftime('%Y-%m-%d'), exports['Jobs'])) == [
+        ('MV A', '2024-05-01', 2), ('MV A', '2024-06-01', 3), ('MV B', '2024-05-01', 1)]
+    latest = store.latest_exports(path)
+    assert list(zip(latest['Vessel'], latest['Export Date'].dt.strftime('%Y-%m-%d'))) == [
+        ('MV A', '2024-06-01'), ('MV B', '2024-05-01')]
+
+
+def test_fleet_queries(path):
+    a = store.save_export(VESSEL_A, 'MV A', '2024-06-01', path=path)
+    b = store.save_export(VESSEL_B, 'MV B', '2024-06-01', path=path)
+    assert store.jobs_with_code_prefix('601.01', path=path)['Equipment Code'].tolist() == ['601.01', '601.01.001']
+    assert store.jobs_with_code_prefix('601', path=path)['Vessel'].tolist() == ['MV A', 'MV A', 'MV B']
+    assert store.jobs_with_code_prefix('601', [b], path=path)['Equipment Code'].tolist() == ['601.02']
+    assert store.jobs_with_job_code('FIRE-PUMP-INSP', path=path)['Vessel'].tolist() == ['MV A', 'MV B']
+    assert store.jobs_with_job_code('FIRE-PUMP-INSP', [a], path=path)['Equipment Code'].tolist() == ['601.01']
+    due = store.jobs_due_between('2024-06-01', '2024-06-30', path=path)
+    assert due['Equipment Code'].tolist() == ['601.01', '601.02']
+
+
+def test_stored_export_gives_the_same_analysis(path):
+    export_id = store.save_export(VESSEL_A, 'MV A', '2024-06-01', path=path)
+    stored = store.load_export(export_id, path).drop(columns=['Vessel', 'Export Date'])
+    today = pd.Timestamp('2024-06-15').date()
+    original = VESSEL_A.copy()
+    original['Last Done Date'] = pd.to_datetime(original['Last Done Date'])
+    expected, result = analyze(original, today), analyze(stored, today)
+    assert {name: result.count(name) for name in result.rows} == {name: expected.count(name)
+                                                                  for name in expected.rows}
+    assert np.array_equal(np.sort(result.critical_equipment()), np.sort(expected.critical_equipment()))